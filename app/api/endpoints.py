@@ -1,31 +1,202 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Body, Path as PathParam, Request
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, status, Body, Path as PathParam, Query, Request, params
+from fastapi.routing import APIRoute
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response
+from starlette.background import BackgroundTask
 from pathlib import Path
 import shutil
-import requests
-from urllib.parse import urlparse, unquote
+import asyncio
+import functools
+from concurrent.futures.process import BrokenProcessPool
+import ipaddress
+import socket
+from urllib.parse import urlparse, urljoin, unquote, quote
 from uuid import uuid4
-import tempfile
+from datetime import datetime
 import os
 import re
-import json
-import mimetypes
-from typing import Optional
+import logging
+from typing import Any, AsyncIterator, Callable, Coroutine, Optional, Tuple, Union
+
+import httpcore
+import httpx
 
 from app.config import settings
-from app.models.schemas import HealthResponse, ErrorResponse, URLExtractionRequest, HtmlExtractionResponse, AssetUrl
+from app.models.schemas import (
+    HealthResponse, ErrorResponse, URLExtractionRequest, HtmlExtractionResponse,
+    BatchURLRequest, BatchItemResult, BatchExtractionResponse,
+)
 from app.services.image_extractor import PDFImageExtractor
 from app.services.layout_extractor import extract_layout
 from app.services.html_renderer import render_html, render_html_exact
 from app.services.structured_extractor import extract_structured
 
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class UploadSizeLimitRoute(APIRoute):
+    """
+    Route that refuses oversized file uploads from the Content-Length header.
+
+    FastAPI parses the whole multipart body (spooling it to disk) before the
+    endpoint runs, so for routes with File parameters the check is done here,
+    ahead of body parsing.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        route_handler = super().get_route_handler()
+        if not any(isinstance(field.field_info, params.File) for field in self.dependant.body_params):
+            return route_handler
+
+        async def size_limited_route_handler(request: Request) -> Response:
+            content_length = request.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > MAX_FILE_SIZE_BYTES + MULTIPART_OVERHEAD_BYTES:
+                _check_file_size(int(content_length))
+            return await route_handler(request)
+
+        return size_limited_route_handler
+
+
+router = APIRouter(route_class=UploadSizeLimitRoute)
 extractor = PDFImageExtractor()
 
 # Session manager will be initialized in main.py
 session_manager = None
 
+# Process pool for CPU-bound extraction, initialized in main.py. The factory
+# builds a replacement once a worker dies and the pool becomes unusable;
+# extraction_pool_broken stays set while no replacement could be built.
+extraction_pool = None
+extraction_pool_factory = None
+extraction_pool_broken = False
+extraction_pool_lock = asyncio.Lock()
+
+# Caps in-flight extractions so excess requests queue instead of piling work
+# (and their PDF buffers) onto the process pool
+extraction_semaphore = asyncio.Semaphore(
+    settings.max_concurrent_extractions or settings.extraction_workers or os.cpu_count() or 4
+)
+queued_extractions = 0
+
+# Caps batch items in flight. A slot is held from the start of the download until
+# the extraction returns, so a large batch doesn't hold every PDF in memory
+# while its extractions wait for the pool
+batch_item_semaphore = asyncio.Semaphore(
+    settings.max_concurrent_extractions or settings.extraction_workers or os.cpu_count() or 4
+)
+
+
+class PublicAddressNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that resolves hosts itself and only dials public addresses.
+
+    The address is checked on the connection that is actually opened, so DNS
+    can't hand out a different one between the check and the connect. Requests
+    keep the URL's host, so connections are pooled and TLS-verified per host.
+    """
+
+    def __init__(self, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None,
+                          local_address: Optional[str] = None, socket_options=None) -> httpcore.AsyncNetworkStream:
+        if not settings.allow_private_pdf_urls:
+            host = await _resolve_public_address(host, port)
+        return await self._backend.connect_tcp(
+            host, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+        )
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                                  socket_options=None) -> httpcore.AsyncNetworkStream:
+        raise httpcore.ConnectError("Unix sockets are not used for PDF downloads")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class PublicAddressTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport whose connections are opened through PublicAddressNetworkBackend."""
+
+    def __init__(self, *, verify=True, http2: bool = False, retries: int = 0,
+                 limits: httpx.Limits = httpx.Limits()):
+        # AsyncHTTPTransport takes no network backend, so the pool is built here
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=verify),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http2=http2,
+            retries=retries,
+            network_backend=PublicAddressNetworkBackend(),
+        )
+
+
+# Shared async HTTP client for PDF downloads (closed on application shutdown).
+# Keep-alive connections are pooled across requests, HTTP/2 is negotiated where
+# the server supports it, and failed connects are retried. Redirects are
+# followed by _open_download so every hop passes the URL check.
+http_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(30, connect=10),
+    follow_redirects=False,
+    transport=PublicAddressTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    ),
+)
+
+
+# Maximum accepted PDF size in bytes (settings.max_file_size is in MB)
+MAX_FILE_SIZE_BYTES = settings.max_file_size * 1024 * 1024
+
+# Chunk size used when reading uploaded files
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Chunk size used when streaming remote PDFs; small chunks spend most of the
+# download time in per-chunk Python overhead
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Public base URL from settings, normalized once (None means auto-detect per request)
+CONFIGURED_BASE_URL = settings.base_url.rstrip('/') if settings.base_url else None
+
+# Upload filename suffixes accepted by the upload endpoints (settings.allowed_extensions,
+# comma-separated, e.g. "pdf")
+ALLOWED_UPLOAD_SUFFIXES = tuple(
+    f".{ext.strip().lower()}" for ext in settings.allowed_extensions.split(",") if ext.strip()
+)
+
+# Fields of the /health response that never change
+HEALTH_STATIC_FIELDS = {
+    "status": "healthy",
+    "app_name": settings.app_name,
+    "version": settings.app_version,
+}
+
+# Session IDs are uuid4().hex strings
+SESSION_ID_RE = re.compile(r'\A[a-f0-9]{32}\Z')
+
+# Content types of the image files served from sessions, keyed by extension
+IMAGE_CONTENT_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+}
+
+# Large downloads from servers that accept byte ranges are fetched as parallel
+# ranges of RANGED_DOWNLOAD_PART_BYTES, at most RANGED_DOWNLOAD_CONCURRENCY at once
+RANGED_DOWNLOAD_MIN_BYTES = 8 * 1024 * 1024
+RANGED_DOWNLOAD_PART_BYTES = 4 * 1024 * 1024
+RANGED_DOWNLOAD_CONCURRENCY = 4
+
+# Redirects followed for a PDF URL before giving up
+MAX_DOWNLOAD_REDIRECTS = 5
+
+# Allowance for the multipart envelope around an uploaded file when comparing
+# the request Content-Length against the maximum file size
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
 
 def set_session_manager(manager):
     """Set the global session manager instance."""
@@ -33,42 +204,487 @@ def set_session_manager(manager):
     session_manager = manager
 
 
+def set_extraction_pool(pool, factory=None):
+    """Set the process pool used for CPU-bound extraction work and how to rebuild it."""
+    global extraction_pool, extraction_pool_factory, extraction_pool_broken
+    extraction_pool = pool
+    extraction_pool_factory = factory
+    extraction_pool_broken = False
+
+
+def get_extraction_pool():
+    """Return the current extraction pool (it is replaced if a worker dies)."""
+    return extraction_pool
+
+
+async def _replace_broken_pool(broken_pool) -> None:
+    """
+    Swap a broken extraction pool for a new one (no-op if it was already replaced).
+
+    If no replacement can be built, extraction_pool_broken is left set so /health
+    reports the instance as unhealthy.
+    """
+    global extraction_pool, extraction_pool_broken
+    async with extraction_pool_lock:
+        if extraction_pool is not broken_pool:
+            return
+        extraction_pool_broken = True
+        if extraction_pool_factory is None:
+            return
+        logger.warning("Extraction worker died; replacing the process pool")
+        try:
+            extraction_pool = extraction_pool_factory()
+        except Exception as e:
+            logger.error("Could not replace broken extraction pool: %s", e)
+            return
+        extraction_pool_broken = False
+    broken_pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_in_pool(func, *args, **kwargs):
+    """
+    Run a CPU-bound call in the extraction process pool (default thread pool if unset).
+
+    If a worker dies (OOM kill, crash in MuPDF) the pool is replaced and 503 is
+    raised. The call is not retried, since it may be the one that killed the worker.
+    """
+    global queued_extractions
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    queued_extractions += 1
+    try:
+        await extraction_semaphore.acquire()
+    finally:
+        queued_extractions -= 1
+    pool = extraction_pool
+    try:
+        return await loop.run_in_executor(pool, call)
+    except BrokenProcessPool:
+        await _replace_broken_pool(pool)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Extraction worker crashed while processing the PDF",
+        )
+    finally:
+        extraction_semaphore.release()
+
+
+def _render_layout_html(layout: dict, assets_base_url: str) -> tuple[str, str]:
+    """Render both HTML variants of a layout in one pool task."""
+    return (
+        render_html(layout, assets_base_url=assets_base_url),
+        render_html_exact(layout, assets_base_url=assets_base_url),
+    )
+
+
 def validate_session_id(session_id: str) -> bool:
     """Validate session ID format (32-character hex string)."""
-    return bool(re.match(r'^[a-f0-9]{32}$', session_id))
+    return SESSION_ID_RE.match(session_id) is not None
 
 
 def validate_filename(filename: str) -> bool:
     """Validate filename to prevent path traversal attacks."""
     # Reject paths containing '..' or path separators
-    if any(char in filename for char in ['/', '\\', '..', '\0']):
+    if '/' in filename or '\\' in filename or '\0' in filename or '..' in filename:
         return False
     # Must have valid image extension
-    valid_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp']
-    return any(filename.lower().endswith(ext) for ext in valid_extensions)
+    return os.path.splitext(filename)[1].lower() in IMAGE_CONTENT_TYPES
 
 
 def get_base_url(request: Request) -> str:
     """Get base URL from settings or auto-detect from request."""
-    if settings.base_url:
-        return settings.base_url.rstrip('/')
+    if CONFIGURED_BASE_URL:
+        return CONFIGURED_BASE_URL
     # Auto-detect from request
     return f"{request.url.scheme}://{request.url.netloc}"
 
 
-def _cleanup_paths(*paths: Path) -> None:
-    """Clean up temporary files and directories."""
+def _create_session(filename: str):
+    """Create a session and return (session_id, session); creating its directory is blocking I/O."""
+    session_id = session_manager.create_session(filename)
+    return session_id, session_manager.get_session(session_id)
+
+
+def _check_file_size(size_bytes: int) -> None:
+    """Raise 413 if size_bytes exceeds the configured maximum file size."""
+    if size_bytes > MAX_FILE_SIZE_BYTES:
+        file_size_mb = size_bytes / (1024 * 1024)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size ({file_size_mb:.2f}MB) exceeds maximum allowed size ({settings.max_file_size}MB)"
+        )
+
+
+async def _read_upload(file: UploadFile) -> Union[bytes, bytearray]:
+    """
+    Read an uploaded file into memory.
+
+    Raises 400 if the content does not start with the PDF magic bytes and 413 as
+    soon as it exceeds the maximum file size.
+    """
+    # The multipart parser has already spooled the whole upload and recorded its
+    # size, so check it up front and read the spool in one call
+    if file.size is not None:
+        _check_file_size(file.size)
+        data = await file.read()
+        if data[:4] != b"%PDF":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded file is not a valid PDF"
+            )
+        return data
+
+    data = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if not data and chunk[:4] != b"%PDF":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded file is not a valid PDF"
+            )
+        data += chunk
+        _check_file_size(len(data))
+    return data
+
+
+async def _read_request_body(request: Request) -> bytearray:
+    """Read a raw PDF request body as it arrives, with the same checks as _read_upload."""
+    data = bytearray()
+    async for chunk in request.stream():
+        if not chunk:
+            continue
+        if not data and chunk[:4] != b"%PDF":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body is not a valid PDF"
+            )
+        data += chunk
+        _check_file_size(len(data))
+    if not data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body is empty"
+        )
+    return data
+
+
+async def _fetch_range(pdf_url: str, target: memoryview, start: int, limiter: asyncio.Semaphore, timeout: float) -> None:
+    """Fetch bytes [start, start + len(target)) of pdf_url into target with a Range request."""
+    headers = {"Range": f"bytes={start}-{start + len(target) - 1}"}
+    async with limiter:
+        async with http_client.stream("GET", pdf_url, headers=headers, timeout=timeout) as response:
+            response.raise_for_status()
+            if response.status_code != status.HTTP_206_PARTIAL_CONTENT:
+                raise httpx.HTTPError("server ignored the range request")
+            expected_range = f"bytes {start}-{start + len(target) - 1}/"
+            if not response.headers.get("content-range", "").startswith(expected_range):
+                raise httpx.HTTPError("range response for the wrong byte range")
+
+            offset = 0
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                if offset + len(chunk) > len(target):
+                    raise httpx.HTTPError("range response longer than requested")
+                target[offset:offset + len(chunk)] = chunk
+                offset += len(chunk)
+
+    if offset != len(target):
+        raise httpx.HTTPError("incomplete range response")
+
+
+async def _read_into(
+    chunks: AsyncIterator[bytes],
+    target: memoryview,
+    check_magic: bool,
+    pending: bytes = b""
+) -> Tuple[int, bytes]:
+    """
+    Fill target from an iterator of response body chunks, stopping once it is full.
+
+    pending is data already taken from the iterator that goes first. Returns the
+    bytes read and the unused tail of the last chunk, so the same iterator can be
+    used to continue reading the body.
+    """
+    received = 0
+    if pending:
+        received = min(len(pending), len(target))
+        target[:received] = pending[:received]
+        if received == len(target):
+            return received, pending[received:]
+    async for chunk in chunks:
+        if check_magic and not received and chunk[:4] != b"%PDF":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="URL does not point to a valid PDF file",
+            )
+        take = min(len(chunk), len(target) - received)
+        target[received:received + take] = chunk[:take]
+        received += take
+        if received == len(target):
+            return received, chunk[take:]
+    return received, b""
+
+
+async def _download_ranged(
+    pdf_url: str,
+    response: httpx.Response,
+    size: int,
+    check_magic: bool,
+    timeout: float
+) -> bytearray:
+    """
+    Download a large PDF as parallel byte ranges into a preallocated buffer.
+
+    Args:
+        pdf_url: URL of the PDF (after redirects)
+        response: Open streaming response for the whole file; it supplies the first part
+        size: Total size from Content-Length
+        check_magic: Whether to check the %PDF magic bytes on the first chunk
+        timeout: Timeout for each range request
+
+    Returns:
+        The downloaded PDF bytes
+    """
+    pdf_data = bytearray(size)
+    view = memoryview(pdf_data)
+    first_end = min(RANGED_DOWNLOAD_PART_BYTES, size)
+    chunks = response.aiter_bytes(DOWNLOAD_CHUNK_SIZE)
+
+    # The remaining parts are fetched concurrently while the open response
+    # fills in the first one
+    limiter = asyncio.Semaphore(RANGED_DOWNLOAD_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(
+            _fetch_range(pdf_url, view[start:min(start + RANGED_DOWNLOAD_PART_BYTES, size)], start, limiter, timeout)
+        )
+        for start in range(first_end, size, RANGED_DOWNLOAD_PART_BYTES)
+    ]
+    try:
+        received, pending = await _read_into(chunks, view[:first_end], check_magic)
+        if received != first_end:
+            raise httpx.HTTPError("incomplete response")
+
+        try:
+            await asyncio.gather(*tasks)
+        except httpx.HTTPError as e:
+            # Ranges advertised but not honoured (200, wrong Content-Range, ...):
+            # read the rest of the body from the response that is still open
+            logger.info("Ranged download of %s failed (%s), streaming the rest", pdf_url, e)
+            await _cancel_tasks(tasks)
+            received, _ = await _read_into(chunks, view[first_end:], False, pending)
+            if received != size - first_end:
+                raise httpx.HTTPError("incomplete response")
+    except BaseException:
+        await _cancel_tasks(tasks)
+        raise
+
+    return pdf_data
+
+
+async def _cancel_tasks(tasks: list) -> None:
+    """Cancel tasks and wait until they have finished."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _check_download_url(pdf_url: str) -> None:
+    """
+    Reject URLs that are not absolute http(s) URLs with a valid port.
+
+    Runs before any request is sent. Whether the host resolves to a public
+    address is checked when the connection is opened, see
+    PublicAddressNetworkBackend.
+    """
+    parsed = urlparse(pdf_url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid URL format (expected an absolute http or https URL)",
+        )
+    try:
+        # .port raises ValueError for a non-numeric or out-of-range port
+        parsed.port
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid URL port")
+
+
+async def _resolve_public_address(host: str, port: int) -> str:
+    """
+    Resolve host and return the address to connect to.
+
+    Raises 400 if the host does not resolve or any of its addresses is not
+    public, so internal services (e.g. cloud metadata at 169.254.169.254) can't
+    be reached through the download endpoints.
+    """
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Could not resolve PDF URL host")
+
+    for *_, sockaddr in addresses:
+        # Drop an IPv6 zone index ("fe80::1%eth0") before parsing
+        if not ipaddress.ip_address(sockaddr[0].split("%", 1)[0]).is_global:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="PDF URL must point to a public address",
+            )
+    return addresses[0][4][0]
+
+
+async def _open_download(pdf_url: str, timeout: float) -> tuple:
+    """
+    Send a streaming GET for pdf_url, following redirects by hand.
+
+    Every redirect target goes through _check_download_url before it is
+    requested, and every new connection through the address check.
+
+    Returns:
+        Tuple of (open response, final URL); the caller must close the response
+    """
+    for _ in range(MAX_DOWNLOAD_REDIRECTS + 1):
+        _check_download_url(pdf_url)
+        request = http_client.build_request("GET", pdf_url, timeout=timeout)
+        response = await http_client.send(request, stream=True)
+        if not response.is_redirect:
+            return response, pdf_url
+        location = response.headers["location"]
+        await response.aclose()
+        pdf_url = urljoin(pdf_url, location)
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Too many redirects downloading PDF")
+
+
+async def _download_pdf(pdf_url: str, skip_magic_check: bool = False, timeout: float = 120) -> bytearray:
+    """
+    Download a remote PDF into memory without blocking the event loop.
+
+    Raises 413 once the download exceeds the maximum file size and 400 if a
+    response that is not declared as PDF does not start with the PDF magic bytes
+    (unless skip_magic_check is set). Large files from servers that accept byte
+    ranges are fetched as parallel ranges.
+    """
+    try:
+        response, pdf_url = await _open_download(pdf_url, timeout)
+        try:
+            response.raise_for_status()
+
+            content_length = response.headers.get("content-length", "")
+            if content_length.isdigit():
+                _check_file_size(int(content_length))
+
+            # Responses not declared as PDF are checked for the magic bytes on
+            # the first chunk, before anything is buffered
+            content_type = response.headers.get("content-type", "").lower()
+            check_magic = not skip_magic_check and "application/pdf" not in content_type
+
+            # With a known, unencoded size the body is written into a buffer
+            # allocated once instead of one that is regrown as chunks arrive
+            if content_length.isdigit() and "content-encoding" not in response.headers:
+                size = int(content_length)
+                # Parallel ranges only pay off as separate TCP connections; over
+                # HTTP/2 they would all share the one already open
+                if (
+                    size >= RANGED_DOWNLOAD_MIN_BYTES
+                    and response.http_version == "HTTP/1.1"
+                    and response.headers.get("accept-ranges", "").lower() == "bytes"
+                ):
+                    return await _download_ranged(pdf_url, response, size, check_magic, timeout)
+
+                pdf_data = bytearray(size)
+                received, _ = await _read_into(
+                    response.aiter_bytes(DOWNLOAD_CHUNK_SIZE), memoryview(pdf_data), check_magic
+                )
+                if received != size:
+                    raise httpx.HTTPError("incomplete response")
+                return pdf_data
+
+            pdf_data = bytearray()
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                if check_magic and not pdf_data and chunk[:4] != b"%PDF":
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="URL does not point to a valid PDF file",
+                    )
+                pdf_data += chunk
+                _check_file_size(len(pdf_data))
+            return pdf_data
+        finally:
+            await response.aclose()
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Timeout downloading PDF")
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Failed to download PDF: {e}")
+
+
+def _cleanup_paths(*paths: Optional[Union[str, Path]]) -> None:
+    """Clean up temporary files and directories (None entries are ignored)."""
     for path in paths:
+        if path is None:
+            continue
         try:
-            p = Path(path)
-            if p.is_dir():
-                shutil.rmtree(p, ignore_errors=True)
-            elif p.exists():
-                p.unlink()
+            # Try the common case (a file) first; fall back to rmtree for directories
+            # (unlink on a directory raises EISDIR on Linux, EPERM on macOS)
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except (IsADirectoryError, PermissionError):
+            shutil.rmtree(path, ignore_errors=True)
         except Exception:
             pass
 
 
+async def _extract_zip_response(pdf_data: bytes, filename: str, request: Request) -> FileResponse:
+    """
+    Extract images and page renders from PDF bytes and return the ZIP as a FileResponse.
+
+    With public URLs enabled, extracted files are kept in a new session and only the
+    ZIP is removed after sending; otherwise everything is removed after sending.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+
+    if settings.enable_public_urls and session_manager:
+        # New flow: Create session, keep files
+        session_id, session = await asyncio.to_thread(_create_session, filename)
+        base_url = get_base_url(request)
+
+        output_dir, zip_path, render_count, total_files, extraction_time = await _run_in_pool(
+            extractor.extract_images_and_renders_from_bytes,
+            pdf_data,
+            filename,
+            output_subdir=str(session.output_dir),  # absolute, may live outside output_dir
+            session_id=session_id,
+            base_url=base_url,
+            enable_urls=True
+        )
+
+        # Return with session headers; only the ZIP is removed once sent,
+        # extracted files are kept for the session
+        return FileResponse(
+            path=zip_path,
+            media_type="application/zip",
+            filename=f"{stem}_images.zip",
+            headers={
+                "X-Session-ID": session_id,
+                "X-Session-Expires": session.expires_at.isoformat()
+            },
+            background=BackgroundTask(_cleanup_paths, zip_path)
+        )
+
+    # Original flow: only the ZIP is written, and it is deleted once sent
+    output_dir, zip_path, render_count, total_files, extraction_time = await _run_in_pool(
+        extractor.extract_images_and_renders_from_bytes,
+        pdf_data,
+        filename,
+        output_subdir=f"{stem}_{uuid4().hex[:8]}",
+        keep_files=False
+    )
+
+    return FileResponse(
+        path=zip_path,
+        media_type="application/zip",
+        filename=f"{stem}_images.zip",
+        background=BackgroundTask(_cleanup_paths, zip_path)
+    )
+
+
 @router.get(
     "/images/{session_id}/{filename}",
     response_class=FileResponse,
@@ -188,10 +804,20 @@ async def get_session_image(
             detail=f"Image not found: {filename}"
         )
 
-    # Determine content type
-    content_type, _ = mimetypes.guess_type(filename)
-    if content_type is None:
-        content_type = "application/octet-stream"
+    # Determine content type (the extension was checked by validate_filename)
+    content_type = IMAGE_CONTENT_TYPES[os.path.splitext(filename)[1].lower()]
+
+    # Behind nginx, hand the transfer off so the file is sent with sendfile
+    # outside the Python worker
+    if settings.images_accel_redirect_prefix:
+        accel_prefix = settings.images_accel_redirect_prefix.rstrip('/')
+        return Response(
+            media_type=content_type,
+            headers={
+                "X-Accel-Redirect": f"{accel_prefix}/{session_id}/{quote(filename)}",
+                "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"
+            }
+        )
 
     # Return image file
     return FileResponse(
@@ -238,9 +864,8 @@ async def get_session_metadata(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Metadata not found for this session (extract with /extract or /extract-from-url first)",
         )
-    with open(metadata_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return JSONResponse(content=data)
+    # The file is already JSON; send it as-is instead of parsing and re-encoding it
+    return FileResponse(metadata_path, media_type="application/json")
 
 
 @router.post(
@@ -280,6 +905,7 @@ async def get_session_metadata(
     - Files are processed in memory - nothing is stored
     - Automatic cleanup after download
     - Maximum file size: 50 MB (configurable)
+    - For large PDFs prefer `/extract-raw`, which skips multipart parsing
     """
 )
 async def extract_images(
@@ -302,105 +928,92 @@ async def extract_images(
     **Returns:**
     - ZIP file with all extracted images and renders
     """
-    # Validate file extension
-    if not file.filename.endswith('.pdf'):
+    # Validate file extension (case-insensitive, e.g. report.PDF)
+    if not (file.filename or '').lower().endswith(ALLOWED_UPLOAD_SUFFIXES):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only PDF files are allowed"
         )
 
-    # Create temporary file for PDF
-    pdf_fd, pdf_temp_path = tempfile.mkstemp(suffix='.pdf', prefix='upload_')
-    os.close(pdf_fd)
-    pdf_path = Path(pdf_temp_path)
+    try:
+        # Read uploaded file into memory (PyMuPDF opens it straight from bytes),
+        # stopping as soon as it exceeds the maximum file size
+        pdf_data = await _read_upload(file)
 
-    output_dir = None
-    zip_path = None
+        return await _extract_zip_response(pdf_data, file.filename, request)
 
-    try:
-        # Save uploaded file to temp location
-        with open(pdf_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error extracting images: {str(e)}"
+        )
 
-        # Check file size
-        file_size_mb = pdf_path.stat().st_size / (1024 * 1024)
-        if file_size_mb > settings.max_file_size:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File size ({file_size_mb:.2f}MB) exceeds maximum allowed size ({settings.max_file_size}MB)"
-            )
 
-        # Extract images
-        if settings.enable_public_urls and session_manager:
-            # New flow: Create session, keep files
-            session_id = session_manager.create_session(file.filename)
-            session = session_manager.get_session(session_id)
-            base_url = get_base_url(request)
-
-            output_subdir = f"sessions/{session_id}"
-            output_dir, zip_path, render_count, total_files, extraction_time = (
-                extractor.extract_images_and_renders(
-                    str(pdf_path),
-                    output_subdir=output_subdir,
-                    session_id=session_id,
-                    base_url=base_url,
-                    enable_urls=True
-                )
-            )
+@router.post(
+    "/extract-raw",
+    response_class=FileResponse,
+    responses={
+        200: {
+            "description": "ZIP file containing all extracted images and page renders",
+            "content": {"application/zip": {}}
+        },
+        400: {
+            "model": ErrorResponse,
+            "description": "Request body is not a valid PDF"
+        },
+        413: {
+            "model": ErrorResponse,
+            "description": "File size exceeds maximum allowed limit"
+        },
+        415: {
+            "model": ErrorResponse,
+            "description": "Content-Type is not application/pdf"
+        },
+        500: {
+            "model": ErrorResponse,
+            "description": "Server error during image extraction"
+        }
+    },
+    summary="📥 Extract images from a raw PDF request body",
+    description="""
+    Same as `/extract`, but the PDF is sent as the raw request body
+    (`Content-Type: application/pdf`) instead of a multipart form.
 
-            # Read ZIP into memory
-            with open(zip_path, 'rb') as f:
-                zip_content = f.read()
-
-            # Create temporary file for response
-            zip_fd, zip_temp_path = tempfile.mkstemp(suffix='.zip', prefix='response_')
-            os.close(zip_fd)
-            with open(zip_temp_path, 'wb') as f:
-                f.write(zip_content)
-
-            # Clean up only the ZIP file, keep extracted files for session
-            _cleanup_paths(zip_path)
-
-            # Return with session headers
-            return FileResponse(
-                path=zip_temp_path,
-                media_type="application/zip",
-                filename=f"{Path(file.filename).stem}_images.zip",
-                headers={
-                    "X-Session-ID": session_id,
-                    "X-Session-Expires": session.expires_at.isoformat()
-                },
-                background=None
-            )
-        else:
-            # Original flow: Extract, send, delete everything
-            output_subdir = f"{Path(file.filename).stem}_{uuid4().hex[:8]}"
-            output_dir, zip_path, render_count, total_files, extraction_time = (
-                extractor.extract_images_and_renders(
-                    str(pdf_path),
-                    output_subdir=output_subdir
-                )
-            )
+    The body is consumed as it arrives, without multipart parsing or spooling
+    to a temporary file, which makes this the cheapest way to send large PDFs.
 
-            # Read ZIP into memory
-            with open(zip_path, 'rb') as f:
-                zip_content = f.read()
+    **Example:**
+    ```
+    curl -X POST "http://localhost:5050/api/v1/extract-raw?filename=document.pdf" \\
+         -H "Content-Type: application/pdf" --data-binary @document.pdf -o images.zip
+    ```
+
+    **Returns:** A ZIP file with page renders and embedded images, like `/extract`.
+    """
+)
+async def extract_images_raw(
+    request: Request,
+    filename: str = Query("document.pdf", description="Name of the PDF, used for the ZIP and metadata")
+):
+    """Extract all images from a PDF sent as the raw request body."""
+    content_type = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if content_type not in ("application/pdf", "application/octet-stream"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send the PDF with Content-Type: application/pdf"
+        )
 
-            # Create temporary file for response
-            zip_fd, zip_temp_path = tempfile.mkstemp(suffix='.zip', prefix='response_')
-            os.close(zip_fd)
-            with open(zip_temp_path, 'wb') as f:
-                f.write(zip_content)
+    # Reject oversized bodies from the Content-Length header before reading them
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit():
+        _check_file_size(int(content_length))
 
-            # Clean up extraction artifacts immediately
-            _cleanup_paths(output_dir, zip_path)
+    try:
+        pdf_data = await _read_request_body(request)
 
-            return FileResponse(
-                path=zip_temp_path,
-                media_type="application/zip",
-                filename=f"{Path(file.filename).stem}_images.zip",
-                background=None
-            )
+        return await _extract_zip_response(pdf_data, filename, request)
 
     except HTTPException:
         raise
@@ -409,16 +1022,6 @@ async def extract_images(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error extracting images: {str(e)}"
         )
-    finally:
-        # Clean up uploaded PDF
-        _cleanup_paths(pdf_path)
-        # Clean up extraction artifacts only if not using sessions
-        if not settings.enable_public_urls:
-            if output_dir:
-                _cleanup_paths(output_dir)
-        # Always clean up the ZIP file itself (content is in temp file)
-        if zip_path:
-            _cleanup_paths(zip_path)
 
 
 @router.post(
@@ -431,7 +1034,7 @@ async def extract_images(
         },
         400: {
             "model": ErrorResponse,
-            "description": "Invalid URL or URL does not point to a valid PDF"
+            "description": "URL does not point to a valid PDF"
         },
         408: {
             "model": ErrorResponse,
@@ -469,7 +1072,7 @@ async def extract_images(
     - File size must not exceed 50 MB
 
     **Notes:**
-    - Files are downloaded to temporary storage
+    - Files are downloaded into memory (the PDF is never written to disk)
     - Automatic validation of PDF format
     - Complete cleanup after processing
     - 30 second timeout for downloads
@@ -516,177 +1119,141 @@ async def extract_images_from_url(
     - ZIP file with all extracted images and renders
 
     **Error Cases:**
-    - 400: Invalid URL format or not a PDF
+    - 400: URL does not point to a PDF
     - 408: Download timeout (>30 seconds)
     - 413: File too large (>50 MB)
     - 500: Extraction or server error
     """
+    # URL format is validated by URLExtractionRequest
     pdf_url = url_request.url
 
-    # Validate URL format
-    try:
-        parsed_url = urlparse(pdf_url)
-        if not parsed_url.scheme or not parsed_url.netloc:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid URL format"
-            )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid URL: {str(e)}"
-        )
-
     # Extract filename from URL
-    url_path = unquote(parsed_url.path)
-    filename = Path(url_path).name
-    if not filename.lower().endswith('.pdf'):
+    url_path = unquote(urlparse(pdf_url).path)
+    filename = os.path.basename(url_path.rstrip('/'))
+    url_has_pdf_ext = filename.lower().endswith('.pdf')
+    if not url_has_pdf_ext:
         filename = f"{filename}.pdf" if filename else "downloaded.pdf"
 
-    # Create temporary file for downloaded PDF
-    pdf_fd, pdf_temp_path = tempfile.mkstemp(suffix='.pdf', prefix='download_')
-    os.close(pdf_fd)
-    pdf_path = Path(pdf_temp_path)
-
-    output_dir = None
-    zip_path = None
-
     try:
-        # Download PDF from URL
-        print(f"Downloading PDF from: {pdf_url}")
-        response = requests.get(pdf_url, stream=True, timeout=30)
-        response.raise_for_status()
-
-        # Check content type
-        content_type = response.headers.get('content-type', '').lower()
-        if 'application/pdf' not in content_type and not filename.lower().endswith('.pdf'):
-            # Try to detect if it's actually a PDF by checking magic bytes
-            first_bytes = response.content[:4]
-            if first_bytes != b'%PDF':
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="URL does not point to a valid PDF file"
-                )
+        # Download PDF from URL into memory; a .pdf URL is trusted without the magic check
+        logger.debug("Downloading PDF from: %s", pdf_url)
+        pdf_data = await _download_pdf(pdf_url, skip_magic_check=url_has_pdf_ext, timeout=30)
+        logger.debug("PDF downloaded successfully (%d bytes)", len(pdf_data))
 
-        # Save downloaded file to temp location
-        with open(pdf_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        return await _extract_zip_response(pdf_data, filename, request_obj)
 
-        print(f"PDF downloaded successfully to temp file")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing PDF: {str(e)}"
+        )
 
-        # Check file size
-        file_size_mb = pdf_path.stat().st_size / (1024 * 1024)
-        if file_size_mb > settings.max_file_size:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File size ({file_size_mb:.2f}MB) exceeds maximum allowed size ({settings.max_file_size}MB)"
-            )
 
-        # Extract images
-        if settings.enable_public_urls and session_manager:
-            # New flow: Create session, keep files
-            session_id = session_manager.create_session(filename)
-            session = session_manager.get_session(session_id)
-            base_url = get_base_url(request_obj)
-
-            output_subdir = f"sessions/{session_id}"
-            output_dir, zip_path, render_count, total_files, extraction_time = (
-                extractor.extract_images_and_renders(
-                    str(pdf_path),
-                    output_subdir=output_subdir,
-                    session_id=session_id,
-                    base_url=base_url,
-                    enable_urls=True
-                )
+async def _extract_batch_item(pdf_url: str, base_url: str) -> BatchItemResult:
+    """Download one PDF and extract it into a new session, reporting failures per item."""
+    try:
+        parsed = urlparse(pdf_url)
+        if not parsed.scheme or not parsed.netloc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid URL format")
+
+        filename = os.path.basename(unquote(parsed.path).rstrip("/"))
+        if not filename.lower().endswith(".pdf"):
+            filename = f"{filename}.pdf" if filename else "downloaded.pdf"
+
+        async with batch_item_semaphore:
+            pdf_data = await _download_pdf(pdf_url)
+
+            session_id, session = await asyncio.to_thread(_create_session, filename)
+            output_dir, zip_path, render_count, total_files, extraction_time = await _run_in_pool(
+                extractor.extract_images_and_renders_from_bytes,
+                pdf_data,
+                filename,
+                output_subdir=str(session.output_dir),  # absolute, may live outside output_dir
+                session_id=session_id,
+                base_url=base_url,
+                enable_urls=True
             )
+        # Files are served from the session, the ZIP is not needed
+        await asyncio.to_thread(_cleanup_paths, zip_path)
 
-            # Read ZIP into memory
-            with open(zip_path, 'rb') as f:
-                zip_content = f.read()
-
-            # Create temporary file for response
-            zip_fd, zip_temp_path = tempfile.mkstemp(suffix='.zip', prefix='response_')
-            os.close(zip_fd)
-            with open(zip_temp_path, 'wb') as f:
-                f.write(zip_content)
-
-            # Clean up only the ZIP file, keep extracted files for session
-            _cleanup_paths(zip_path)
-
-            # Return with session headers
-            return FileResponse(
-                path=zip_temp_path,
-                media_type="application/zip",
-                filename=f"{Path(filename).stem}_images.zip",
-                headers={
-                    "X-Session-ID": session_id,
-                    "X-Session-Expires": session.expires_at.isoformat()
-                },
-                background=None
-            )
-        else:
-            # Original flow: Extract, send, delete everything
-            output_subdir = f"{Path(filename).stem}_{uuid4().hex[:8]}"
-            output_dir, zip_path, render_count, total_files, extraction_time = (
-                extractor.extract_images_and_renders(
-                    str(pdf_path),
-                    output_subdir=output_subdir
-                )
-            )
+        return BatchItemResult(
+            url=pdf_url,
+            success=True,
+            session_id=session_id,
+            session_expires=session.expires_at.isoformat(),
+            metadata_url=f"{base_url}/api/v1/sessions/{session_id}/metadata",
+            total_files=total_files,
+            extraction_time=extraction_time,
+        )
+    except HTTPException as e:
+        return BatchItemResult(url=pdf_url, success=False, error=e.detail)
+    except Exception as e:
+        logger.exception("Batch extraction failed for %s", pdf_url)
+        return BatchItemResult(url=pdf_url, success=False, error=f"Error processing PDF: {str(e)}")
 
-            # Read ZIP into memory
-            with open(zip_path, 'rb') as f:
-                zip_content = f.read()
 
-            # Create temporary file for response
-            zip_fd, zip_temp_path = tempfile.mkstemp(suffix='.zip', prefix='response_')
-            os.close(zip_fd)
-            with open(zip_temp_path, 'wb') as f:
-                f.write(zip_content)
+@router.post(
+    "/extract-batch",
+    response_model=BatchExtractionResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Public URLs disabled or too many URLs"},
+    },
+    summary="📚 Extract images from several PDF URLs",
+    description=f"""
+    Download several PDFs and extract their images and page renders concurrently
+    through the shared extraction worker pool.
 
-            # Clean up extraction artifacts immediately
-            _cleanup_paths(output_dir, zip_path)
+    **Example Request:**
+    ```json
+    {{
+      "urls": ["http://example.com/a.pdf", "http://example.com/b.pdf"]
+    }}
+    ```
 
-            return FileResponse(
-                path=zip_temp_path,
-                media_type="application/zip",
-                filename=f"{Path(filename).stem}_images.zip",
-                background=None
-            )
+    **Returns:** One result per URL, in request order. Successful items carry a
+    `session_id` and a `metadata_url` listing the public image URLs; failed items
+    carry an `error` and do not affect the others.
 
-    except requests.exceptions.Timeout:
-        raise HTTPException(
-            status_code=status.HTTP_408_REQUEST_TIMEOUT,
-            detail="Request timeout while downloading PDF"
-        )
-    except requests.exceptions.RequestException as e:
+    **Notes:**
+    - Requires ENABLE_PUBLIC_URLS=true
+    - At most {settings.max_batch_urls} URLs per request
+    - Each PDF must not exceed {settings.max_file_size} MB
+    """
+)
+async def extract_images_batch(request: Request, batch_request: BatchURLRequest):
+    """Extract images from a list of PDF URLs, one session per PDF."""
+    if not settings.enable_public_urls or session_manager is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Failed to download PDF from URL: {str(e)}"
+            detail="This endpoint requires ENABLE_PUBLIC_URLS=true",
         )
-    except HTTPException:
-        raise
-    except Exception as e:
+    if len(batch_request.urls) > settings.max_batch_urls:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing PDF: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many URLs ({len(batch_request.urls)}), maximum is {settings.max_batch_urls}",
         )
-    finally:
-        # Clean up downloaded PDF
-        _cleanup_paths(pdf_path)
-        # Clean up extraction artifacts only if not using sessions
-        if not settings.enable_public_urls:
-            if output_dir:
-                _cleanup_paths(output_dir)
-        # Always clean up the ZIP file itself (content is in temp file)
-        if zip_path:
-            _cleanup_paths(zip_path)
+
+    # Downloads overlap freely; extraction is bounded by the pool semaphore
+    base_url = get_base_url(request)
+    results = await asyncio.gather(
+        *(_extract_batch_item(pdf_url, base_url) for pdf_url in batch_request.urls)
+    )
+
+    succeeded = sum(1 for r in results if r.success)
+    return BatchExtractionResponse(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=list(results),
+    )
 
 
 @router.post(
     "/extract-html",
     response_model=HtmlExtractionResponse,
+    response_class=ORJSONResponse,
     responses={
         400: {"model": ErrorResponse, "description": "Invalid file format (only PDF allowed)"},
         413: {"model": ErrorResponse, "description": "File size exceeds maximum allowed limit"},
@@ -725,19 +1292,15 @@ async def extract_html(
             detail="This endpoint requires ENABLE_PUBLIC_URLS=true in server configuration",
         )
 
-    pdf_fd, pdf_temp_path = tempfile.mkstemp(suffix=".pdf", prefix="upload_")
-    os.close(pdf_fd)
-    pdf_path = Path(pdf_temp_path)
     filename = "document.pdf"
 
     try:
         if file is not None:
             # --- Mode A: file upload ---
             filename = file.filename or "document.pdf"
-            if not filename.lower().endswith(".pdf"):
+            if not filename.lower().endswith(ALLOWED_UPLOAD_SUFFIXES):
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only PDF files are allowed")
-            with open(pdf_path, "wb") as buf:
-                shutil.copyfileobj(file.file, buf)
+            pdf_data = await _read_upload(file)
         else:
             # --- Mode B: JSON body with pdf_url ---
             try:
@@ -760,54 +1323,38 @@ async def extract_html(
             except Exception:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pdf_url")
 
-            url_filename = Path(unquote(parsed.path)).name
+            url_filename = os.path.basename(unquote(parsed.path).rstrip("/"))
             if url_filename:
                 filename = url_filename if url_filename.lower().endswith(".pdf") else url_filename + ".pdf"
 
-            try:
-                resp = requests.get(pdf_url, stream=True, timeout=120)
-                resp.raise_for_status()
-            except requests.exceptions.Timeout:
-                raise HTTPException(status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Timeout downloading PDF")
-            except requests.exceptions.RequestException as e:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Failed to download PDF: {e}")
-
-            with open(pdf_path, "wb") as f:
-                for chunk in resp.iter_content(chunk_size=8192):
-                    f.write(chunk)
-
-        file_size_mb = pdf_path.stat().st_size / (1024 * 1024)
-        if file_size_mb > settings.max_file_size:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File size ({file_size_mb:.2f}MB) exceeds maximum allowed size ({settings.max_file_size}MB)",
-            )
+            pdf_data = await _download_pdf(pdf_url)
 
-        session_id = session_manager.create_session(filename)
-        session = session_manager.get_session(session_id)
+        session_id, session = await asyncio.to_thread(_create_session, filename)
         out_dir = session.output_dir
 
-        layout = extract_layout(str(pdf_path), str(out_dir))
+        layout = await _run_in_pool(extract_layout, pdf_data, str(out_dir))
 
         base_url = get_base_url(request)
-        assets: list[AssetUrl] = []
-        for img_name in layout.get("image_files", []):
-            img_url = f"{base_url}/api/v1/images/{session_id}/{img_name}"
-            assets.append(AssetUrl(filename=img_name, url=img_url))
-
         assets_base_url = f"{base_url}/api/v1/images/{session_id}/"
 
-        html = render_html(layout, assets_base_url=assets_base_url)
-        html_exact = render_html_exact(layout, assets_base_url=assets_base_url)
-
-        return HtmlExtractionResponse(
-            html=html,
-            html_exact=html_exact,
-            layout=layout,
-            assets=assets,
-            session_id=session_id,
-            session_expires=session.expires_at.isoformat(),
-        )
+        # Filenames come from our own extractor; plain dicts in the AssetUrl shape
+        assets = [
+            {"filename": img_name, "url": assets_base_url + img_name}
+            for img_name in layout.get("image_files", ())
+        ]
+
+        html, html_exact = await _run_in_pool(_render_layout_html, layout, assets_base_url)
+
+        # Returned as a response so FastAPI doesn't re-validate and re-encode the
+        # (potentially large) layout against HtmlExtractionResponse; orjson does it in one pass
+        return ORJSONResponse({
+            "html": html,
+            "html_exact": html_exact,
+            "layout": layout,
+            "assets": assets,
+            "session_id": session_id,
+            "session_expires": session.expires_at.isoformat(),
+        })
 
     except HTTPException:
         raise
@@ -816,13 +1363,12 @@ async def extract_html(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error extracting HTML: {str(e)}",
         )
-    finally:
-        _cleanup_paths(pdf_path)
 
 
 @router.post(
     "/extract-structured",
     response_model=dict,
+    response_class=ORJSONResponse,
     responses={
         400: {"model": ErrorResponse, "description": "Invalid file format (only PDF allowed)"},
         413: {"model": ErrorResponse, "description": "File size exceeds maximum allowed limit"},
@@ -856,18 +1402,14 @@ async def extract_structured_endpoint(
             detail="This endpoint requires ENABLE_PUBLIC_URLS=true",
         )
 
-    pdf_fd, pdf_temp_path = tempfile.mkstemp(suffix=".pdf", prefix="structured_")
-    os.close(pdf_fd)
-    pdf_path = Path(pdf_temp_path)
     filename = "document.pdf"
 
     try:
         if file is not None:
             filename = file.filename or "document.pdf"
-            if not filename.lower().endswith(".pdf"):
+            if not filename.lower().endswith(ALLOWED_UPLOAD_SUFFIXES):
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only PDF files are allowed")
-            with open(pdf_path, "wb") as buf:
-                shutil.copyfileobj(file.file, buf)
+            pdf_data = await _read_upload(file)
         else:
             try:
                 body = await request.json()
@@ -880,38 +1422,20 @@ async def extract_structured_endpoint(
             if not pdf_url:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="JSON body must contain 'pdf_url'")
 
-            from urllib.parse import urlparse, unquote as _unquote
             parsed = urlparse(pdf_url)
-            url_filename = Path(_unquote(parsed.path)).name
+            url_filename = os.path.basename(unquote(parsed.path).rstrip("/"))
             if url_filename:
                 filename = url_filename if url_filename.lower().endswith(".pdf") else url_filename + ".pdf"
 
-            try:
-                resp = requests.get(pdf_url, stream=True, timeout=120)
-                resp.raise_for_status()
-            except requests.exceptions.Timeout:
-                raise HTTPException(status_code=status.HTTP_408_REQUEST_TIMEOUT, detail="Timeout downloading PDF")
-            except requests.exceptions.RequestException as e:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Failed to download PDF: {e}")
-
-            with open(pdf_path, "wb") as f:
-                for chunk in resp.iter_content(chunk_size=8192):
-                    f.write(chunk)
-
-        file_size_mb = pdf_path.stat().st_size / (1024 * 1024)
-        if file_size_mb > settings.max_file_size:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File size ({file_size_mb:.2f}MB) exceeds maximum allowed size ({settings.max_file_size}MB)",
-            )
+            pdf_data = await _download_pdf(pdf_url)
 
-        session_id = session_manager.create_session(filename)
-        session = session_manager.get_session(session_id)
+        session_id, session = await asyncio.to_thread(_create_session, filename)
         out_dir = str(session.output_dir)
         base_url = get_base_url(request)
 
-        structured = extract_structured(
-            pdf_path=str(pdf_path),
+        structured = await _run_in_pool(
+            extract_structured,
+            pdf_source=pdf_data,
             out_dir=out_dir,
             session_id=session_id,
             base_url=base_url,
@@ -922,7 +1446,8 @@ async def extract_structured_endpoint(
         structured["session_id"] = session_id
         structured["session_expires"] = session.expires_at.isoformat()
 
-        return structured
+        # Skip FastAPI's response validation and encoder; orjson serializes it in one pass
+        return ORJSONResponse(structured)
 
     except HTTPException:
         raise
@@ -931,8 +1456,6 @@ async def extract_structured_endpoint(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error extracting structured data: {str(e)}",
         )
-    finally:
-        _cleanup_paths(pdf_path)
 
 
 @router.get(
@@ -948,6 +1471,7 @@ async def extract_structured_endpoint(
       "status": "healthy",
       "app_name": "PDF Image Extractor",
       "version": "1.0.0",
+      "queued_extractions": 0,
       "timestamp": "2026-01-22T02:00:00"
     }
     ```
@@ -970,13 +1494,32 @@ async def health_check():
     Health check endpoint to verify the service is running.
 
     **Returns:**
-    - Service status (always "healthy" if responding)
+    - Service status ("healthy", or "unhealthy" with 503 if the extraction
+      worker pool is broken and could not be replaced)
     - Application name
     - Current version
+    - Number of extractions waiting for a free worker
     - Current timestamp
     """
-    return HealthResponse(
-        status="healthy",
-        app_name=settings.app_name,
-        version=settings.app_version
-    )
+    # A pool that could not be replaced after a worker died is retried here,
+    # so an instance with no extraction traffic still recovers
+    if extraction_pool_broken:
+        await _replace_broken_pool(extraction_pool)
+        if extraction_pool_broken:
+            return ORJSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={
+                    **HEALTH_STATIC_FIELDS,
+                    "status": "unhealthy",
+                    "queued_extractions": queued_extractions,
+                    "timestamp": datetime.now(),
+                },
+            )
+
+    # Static fields are prebuilt; returning the response directly skips
+    # per-request model construction and validation
+    return ORJSONResponse({
+        **HEALTH_STATIC_FIELDS,
+        "queued_extractions": queued_extractions,
+        "timestamp": datetime.now()
+    })
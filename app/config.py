@@ -1,4 +1,5 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
 
@@ -22,19 +23,31 @@ class Settings(BaseSettings):
     output_format: str = "png"
     image_quality: int = 95
 
+    # Processing
+    extraction_workers: Optional[int] = None  # Process pool size, defaults to CPU count
+    max_concurrent_extractions: Optional[int] = None  # In-flight extraction cap, defaults to pool size
+    max_batch_urls: int = 20  # Maximum URLs accepted by /extract-batch
+    allow_private_pdf_urls: bool = False  # Allow PDF URLs that resolve to private/loopback addresses
+
     # Directories
     upload_dir: str = "uploads"
     output_dir: str = "outputs"
+    sessions_dir: Optional[str] = None  # Defaults to <output_dir>/sessions; a tmpfs path keeps sessions in RAM
 
     # Session Management (Public URLs for extracted images)
     enable_public_urls: bool = True
     session_ttl_hours: int = 1
     session_cleanup_interval_minutes: int = 15
     base_url: Optional[str] = None  # Auto-detect from request if None
+    images_accel_redirect_prefix: Optional[str] = None  # e.g. "/_session_images" to let nginx serve images
+
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
+
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings; .env is read only on the first call."""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
@@ -1,21 +1,139 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+from contextlib import asynccontextmanager
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import asyncio
 import logging
+import os
+import logging.handlers
+import queue
+
+from PIL import Image
 
 from app.config import settings
-from app.api.endpoints import router, set_session_manager
+from app.api.endpoints import router, set_session_manager, set_extraction_pool, get_extraction_pool, http_client
 from app.services.session_manager import SessionManager
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging. Records are handed to a queue and written by a listener
+# thread, so a slow or blocked stdout/stderr never stalls the event loop.
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(_log_queue)])
+_log_listener.start()
 logger = logging.getLogger(__name__)
 
-# Global session manager and cleanup task flag
+# Global session manager and extraction pool
 session_manager = None
-cleanup_task_running = False
+extraction_pool = None
+
+
+async def session_cleanup_task():
+    """Background task to cleanup expired sessions."""
+    logger.info(f"Session cleanup task started (interval: {settings.session_cleanup_interval_minutes} minutes)")
+
+    while True:
+        try:
+            # Run cleanup in a worker thread; removing session trees is blocking I/O
+            deleted_count = await asyncio.to_thread(session_manager.cleanup_expired_sessions)
+            if deleted_count > 0:
+                logger.info(f"Cleaned up {deleted_count} expired session(s)")
+
+            # Sleep until the next session expires, checking at least once per interval
+            delay = settings.session_cleanup_interval_minutes * 60
+            next_expiry = session_manager.seconds_until_next_expiry()
+            if next_expiry is not None:
+                delay = min(delay, max(next_expiry, 1))
+            await asyncio.sleep(delay)
+        except Exception as e:
+            logger.error(f"Error in cleanup task: {e}")
+            # Retry after 1 minute on error
+            await asyncio.sleep(60)
+
+
+def _init_worker():
+    """Prepare an extraction worker process."""
+    # Log straight to stderr; the queue listener only runs in the main process
+    logging.basicConfig(level=logging.INFO, force=True)
+    # Load PIL's codec plugins now instead of on the first image conversion
+    Image.init()
+
+
+def _create_extraction_pool() -> ProcessPoolExecutor:
+    """Create the process pool for CPU-bound PDF extraction."""
+    return ProcessPoolExecutor(
+        max_workers=settings.extraction_workers,
+        initializer=_init_worker
+    )
+
+
+def _worker_ready():
+    """No-op task used to start the extraction workers ahead of the first request."""
+    return None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize application resources on startup and release them on shutdown"""
+    global session_manager, extraction_pool
+
+    # Create necessary directories
+    Path(settings.upload_dir).mkdir(parents=True, exist_ok=True)
+    Path(settings.output_dir).mkdir(parents=True, exist_ok=True)
+
+    logger.info("%s v%s started successfully", settings.app_name, settings.app_version)
+    logger.info("Upload directory: %s", settings.upload_dir)
+    logger.info("Output directory: %s", settings.output_dir)
+
+    # CPU-bound PDF extraction runs in worker processes, off the event loop
+    # (rebuilt by the endpoints if a worker dies and breaks the pool)
+    extraction_pool = _create_extraction_pool()
+    set_extraction_pool(extraction_pool, _create_extraction_pool)
+
+    # Start the workers now so the first requests don't pay for process startup
+    loop = asyncio.get_running_loop()
+    worker_count = settings.extraction_workers or os.cpu_count() or 1
+    await asyncio.gather(*(loop.run_in_executor(extraction_pool, _worker_ready) for _ in range(worker_count)))
+
+    # Initialize session management if enabled
+    cleanup_task = None
+    if settings.enable_public_urls:
+        # Create sessions directory
+        sessions_dir = Path(settings.sessions_dir or Path(settings.output_dir) / "sessions")
+        sessions_dir.mkdir(parents=True, exist_ok=True)
+
+        # Initialize session manager
+        session_manager = SessionManager(
+            ttl_hours=settings.session_ttl_hours,
+            base_output_dir=Path(settings.output_dir),
+            sessions_dir=sessions_dir
+        )
+
+        # Pass to endpoints module
+        set_session_manager(session_manager)
+
+        # Start background cleanup task
+        cleanup_task = asyncio.create_task(session_cleanup_task())
+
+        logger.info(
+            "Public URLs enabled (TTL: %sh, cleanup: %smin)",
+            settings.session_ttl_hours,
+            settings.session_cleanup_interval_minutes
+        )
+        logger.info("Sessions directory: %s", sessions_dir)
+    else:
+        logger.info("Public URLs disabled (immediate cleanup)")
+
+    yield
+
+    logger.info("Application shutting down, stopping cleanup task...")
+    if cleanup_task is not None:
+        cleanup_task.cancel()
+    await http_client.aclose()
+    # The endpoints may have replaced the pool after a worker crash
+    get_extraction_pool().shutdown(wait=False, cancel_futures=True)
+    _log_listener.stop()
 
 
 # Create FastAPI app
@@ -50,6 +168,8 @@ app = FastAPI(
     - Configurable file size limits
     """,
     version=settings.app_version,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     contact={
@@ -75,73 +195,6 @@ app.add_middleware(
 app.include_router(router, prefix="/api/v1", tags=["PDF Image Extraction"])
 
 
-async def session_cleanup_task():
-    """Background task to cleanup expired sessions."""
-    global cleanup_task_running
-    cleanup_task_running = True
-
-    logger.info(f"Session cleanup task started (interval: {settings.session_cleanup_interval_minutes} minutes)")
-
-    while cleanup_task_running:
-        try:
-            # Run cleanup
-            deleted_count = session_manager.cleanup_expired_sessions()
-            if deleted_count > 0:
-                logger.info(f"Cleaned up {deleted_count} expired session(s)")
-
-            # Wait for next interval
-            await asyncio.sleep(settings.session_cleanup_interval_minutes * 60)
-        except Exception as e:
-            logger.error(f"Error in cleanup task: {e}")
-            # Retry after 1 minute on error
-            await asyncio.sleep(60)
-
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize application on startup"""
-    global session_manager
-
-    # Create necessary directories
-    Path(settings.upload_dir).mkdir(parents=True, exist_ok=True)
-    Path(settings.output_dir).mkdir(parents=True, exist_ok=True)
-
-    print(f"✅ {settings.app_name} v{settings.app_version} started successfully!")
-    print(f"📁 Upload directory: {settings.upload_dir}")
-    print(f"📁 Output directory: {settings.output_dir}")
-
-    # Initialize session management if enabled
-    if settings.enable_public_urls:
-        # Create sessions directory
-        sessions_dir = Path(settings.output_dir) / "sessions"
-        sessions_dir.mkdir(parents=True, exist_ok=True)
-
-        # Initialize session manager
-        session_manager = SessionManager(
-            ttl_hours=settings.session_ttl_hours,
-            base_output_dir=Path(settings.output_dir)
-        )
-
-        # Pass to endpoints module
-        set_session_manager(session_manager)
-
-        # Start background cleanup task
-        asyncio.create_task(session_cleanup_task())
-
-        print(f"🔗 Public URLs enabled (TTL: {settings.session_ttl_hours}h, cleanup: {settings.session_cleanup_interval_minutes}min)")
-        print(f"📁 Sessions directory: {sessions_dir}")
-    else:
-        print("🔒 Public URLs disabled (immediate cleanup)")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on application shutdown"""
-    global cleanup_task_running
-    cleanup_task_running = False
-    logger.info("Application shutting down, stopping cleanup task...")
-
-
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint with API information"""
@@ -171,9 +224,14 @@ async def global_exception_handler(request, exc):
 
 if __name__ == "__main__":
     import uvicorn
+    # httptools and uvloop come with uvicorn[standard]; both transports already
+    # set TCP_NODELAY on accepted connections
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug
+        reload=settings.debug,
+        http="httptools",
+        loop="uvloop",
+        backlog=2048
     )
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import List, Optional
 from datetime import datetime
+from urllib.parse import urlparse
 
 
 class URLExtractionRequest(BaseModel):
@@ -14,21 +15,66 @@ class URLExtractionRequest(BaseModel):
         ]
     )
 
-    class Config:
-        json_schema_extra = {
-            "examples": [
-                {
-                    "url": "http://example.com/document.pdf"
-                },
-                {
-                    "url": "https://www.w3.org/WAI/ER/tests/xhtml/testfiles/resources/pdf/dummy.pdf"
-                }
-            ]
-        }
+    @field_validator("url")
+    @classmethod
+    def validate_url(cls, v: str) -> str:
+        """Reject anything that is not an absolute http(s) URL before the handler runs."""
+        parsed = urlparse(v)
+        if parsed.scheme not in ("http", "https") or not parsed.netloc:
+            raise ValueError("Invalid URL format (expected an absolute http or https URL)")
+        try:
+            # .port raises ValueError for a non-numeric or out-of-range port
+            parsed.port
+        except ValueError:
+            raise ValueError("Invalid URL port")
+        return v
+
+    model_config = ConfigDict(json_schema_extra={
+        "examples": [
+            {
+                "url": "http://example.com/document.pdf"
+            },
+            {
+                "url": "https://www.w3.org/WAI/ER/tests/xhtml/testfiles/resources/pdf/dummy.pdf"
+            }
+        ]
+    })
+
+
+class BatchURLRequest(BaseModel):
+    """Request model for extracting images from several PDF URLs at once"""
+    urls: List[str] = Field(
+        ...,
+        min_length=1,
+        description="Public URLs of the PDF files to extract images from",
+        examples=[["http://example.com/a.pdf", "http://example.com/b.pdf"]]
+    )
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one PDF in a batch extraction"""
+    url: str = Field(..., description="Source URL of the PDF")
+    success: bool = Field(..., description="Whether this PDF was extracted successfully")
+    session_id: Optional[str] = Field(None, description="Session holding the extracted files")
+    session_expires: Optional[str] = Field(None, description="ISO 8601 timestamp when the session expires")
+    metadata_url: Optional[str] = Field(None, description="URL of the session metadata (images, renders, URLs)")
+    total_files: Optional[int] = Field(None, description="Number of extracted images and page renders")
+    extraction_time: Optional[float] = Field(None, description="Extraction time in seconds")
+    error: Optional[str] = Field(None, description="Error message when extraction failed")
+
+
+class BatchExtractionResponse(BaseModel):
+    """Response model for batch extraction"""
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
 
 
 class ImageInfo(BaseModel):
     """Information about an extracted image"""
+    model_config = ConfigDict(frozen=True)
+
     filename: str
     page_number: int
     width: int
@@ -63,17 +109,18 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Service health status", examples=["healthy"])
     app_name: str = Field(..., description="Application name", examples=["PDF Image Extractor"])
     version: str = Field(..., description="Application version", examples=["1.0.0"])
+    queued_extractions: int = Field(0, description="Extractions waiting for a free worker", examples=[0])
     timestamp: datetime = Field(default_factory=datetime.now, description="Current server timestamp")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "healthy",
-                "app_name": "PDF Image Extractor",
-                "version": "1.0.0",
-                "timestamp": "2026-01-22T02:00:00.000000"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "status": "healthy",
+            "app_name": "PDF Image Extractor",
+            "version": "1.0.0",
+            "queued_extractions": 0,
+            "timestamp": "2026-01-22T02:00:00.000000"
         }
+    })
 
 
 class AssetUrl(BaseModel):
@@ -96,17 +143,16 @@ class ErrorResponse(BaseModel):
     """Error response model"""
     detail: str = Field(..., description="Error message describing what went wrong")
 
-    class Config:
-        json_schema_extra = {
-            "examples": [
-                {
-                    "detail": "Only PDF files are allowed"
-                },
-                {
-                    "detail": "File size (75.5MB) exceeds maximum allowed size (50MB)"
-                },
-                {
-                    "detail": "Failed to download PDF from URL: 404 Client Error"
-                }
-            ]
-        }
+    model_config = ConfigDict(json_schema_extra={
+        "examples": [
+            {
+                "detail": "Only PDF files are allowed"
+            },
+            {
+                "detail": "File size (75.5MB) exceeds maximum allowed size (50MB)"
+            },
+            {
+                "detail": "Failed to download PDF from URL: 404 Client Error"
+            }
+        ]
+    })
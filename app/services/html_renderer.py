@@ -5,13 +5,18 @@ from typing import List, Optional
 # Shared utilities
 # ---------------------------------------------------------------------------
 
+_ESCAPE_TABLE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#039;",
+})
+
+
 def _escape(s: str) -> str:
-    return (str(s)
-            .replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
-            .replace('"', "&quot;")
-            .replace("'", "&#039;"))
+    # One pass over the string instead of one per replaced character
+    return str(s).translate(_ESCAPE_TABLE)
 
 
 def _area(bbox: list) -> float:
@@ -28,12 +33,65 @@ def _overlaps(a: list, b: list, expand: float = 4.0) -> bool:
     )
 
 
-def _find_link(bbox: list, links: list) -> Optional[str]:
-    """Return the URL of the first link whose bbox overlaps this block."""
-    for lnk in links:
-        if _overlaps(bbox, lnk["bbox"]):
-            return lnk.get("url")
-    return None
+# Grid cell size (PDF points) for the link index, and the most cells a single
+# bbox may cover before it is treated as "everywhere" instead of being bucketed
+_LINK_GRID_CELL = 64.0
+_LINK_GRID_MAX_CELLS = 256
+
+# Below this many links a plain scan beats building and probing the grid
+_LINK_INDEX_MIN_LINKS = 32
+
+# Same expansion _find_link applies to link bboxes in _overlaps
+_LINK_EXPAND = 4.0
+
+
+def _grid_cells(x0: float, y0: float, x1: float, y1: float) -> Optional[list]:
+    """Grid cells covered by a box, or None if it spans too many to enumerate."""
+    cx0, cx1 = int(x0 // _LINK_GRID_CELL), int(x1 // _LINK_GRID_CELL)
+    cy0, cy1 = int(y0 // _LINK_GRID_CELL), int(y1 // _LINK_GRID_CELL)
+    if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > _LINK_GRID_MAX_CELLS:
+        return None
+    return [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+
+
+def _build_link_index(links: list) -> dict:
+    """
+    Bucket links by the grid cells their (expanded) bbox covers.
+    Each bucket lists link indices in ascending order; links too large to
+    bucket are kept under the None key and checked for every lookup.
+    """
+    index: dict = {None: []}
+    for i, lnk in enumerate(links):
+        x0, y0, x1, y1 = lnk["bbox"]
+        cells = _grid_cells(x0 - _LINK_EXPAND, y0 - _LINK_EXPAND, x1 + _LINK_EXPAND, y1 + _LINK_EXPAND)
+        for cell in cells if cells is not None else (None,):
+            index.setdefault(cell, []).append(i)
+    return index
+
+
+def _find_link(bbox: list, links: list, index: Optional[dict] = None) -> Optional[str]:
+    """
+    Return the URL of the first link whose bbox overlaps this block.
+    With an index from _build_link_index only links sharing a grid cell with
+    the block are tested, instead of every link on the page.
+    """
+    cells = _grid_cells(*bbox) if index is not None else None
+    if cells is None:
+        for lnk in links:
+            if _overlaps(bbox, lnk["bbox"]):
+                return lnk.get("url")
+        return None
+
+    # Keep the linear scan's answer: the lowest-index overlapping link
+    best = None
+    for cell in cells + [None]:
+        for i in index.get(cell, ()):
+            if best is not None and i >= best:
+                break
+            if _overlaps(bbox, links[i]["bbox"]):
+                best = i
+                break
+    return links[best].get("url") if best is not None else None
 
 
 # ---------------------------------------------------------------------------
@@ -58,10 +116,26 @@ def _split_sections(blocks: list, gap: float = 25.0) -> List[list]:
     return sections
 
 
+# _tag results keyed by (font size, bold flag bit)
+_TAG_CACHE: dict = {}
+_TAG_CACHE_MAX_ENTRIES = 1024
+
+
 def _tag(b: dict) -> str:
     size = b.get("size", 12)
-    flags = b.get("flags", 0)
-    bold = bool(flags & 0b10000)
+    bold = b.get("flags", 0) & 0b10000
+    key = (size, bold)
+    kind = _TAG_CACHE.get(key)
+    if kind is None:
+        kind = _classify_tag(size, bool(bold))
+        # Documents use a handful of distinct font sizes; the cap only guards
+        # against pathological input
+        if len(_TAG_CACHE) < _TAG_CACHE_MAX_ENTRIES:
+            _TAG_CACHE[key] = kind
+    return kind
+
+
+def _classify_tag(size: float, bold: bool) -> str:
     if size >= 22:
         return "h1"
     if size >= 17 or (size >= 14 and bold):
@@ -85,18 +159,20 @@ def _detect_column_split(text_blocks: list, page_width: float) -> Optional[float
         return None
 
     x0_vals = sorted(b["bbox"][0] for b in text_blocks)
+    n = len(x0_vals)
+    lo, hi = page_width * 0.25, page_width * 0.80
 
     best_gap = 0.0
     best_split: Optional[float] = None
-    for i in range(1, len(x0_vals)):
+    # Both sides must have at least 2 blocks. Only positive gaps can win, so the
+    # split lies strictly between x0_vals[i - 1] and x0_vals[i]: exactly i blocks
+    # are left of it and n - i are right of it, no recount needed.
+    for i in range(2, n - 1):
         gap = x0_vals[i] - x0_vals[i - 1]
-        split = (x0_vals[i] + x0_vals[i - 1]) / 2.0
-        # Split must be in the middle zone (not near edges)
-        if gap > best_gap and page_width * 0.25 < split < page_width * 0.80:
-            # Both sides must have at least 2 blocks
-            left = sum(1 for b in text_blocks if b["bbox"][0] < split)
-            right = sum(1 for b in text_blocks if b["bbox"][0] >= split)
-            if left >= 2 and right >= 2:
+        if gap > best_gap:
+            split = (x0_vals[i] + x0_vals[i - 1]) / 2.0
+            # Split must be in the middle zone (not near edges)
+            if lo < split < hi:
                 best_gap = gap
                 best_split = split
 
@@ -106,32 +182,36 @@ def _detect_column_split(text_blocks: list, page_width: float) -> Optional[float
     return None
 
 
-def _text_html(b: dict, links: list) -> str:
+# Opening tag (without its closing ">") and closing tag for each _tag kind
+_TAG_TEMPLATES = {
+    "h1": ('<h1 contenteditable="true"', '</h1>\n'),
+    "h2": ('<h2 contenteditable="true"', '</h2>\n'),
+    "h3": ('<h3 contenteditable="true"', '</h3>\n'),
+    "legal": ('<p class="legal" contenteditable="true"', '</p>\n'),
+    "p": ('<p contenteditable="true"', '</p>\n'),
+}
+
+
+def _text_html(b: dict, links: list, link_index: Optional[dict] = None) -> str:
     kind = _tag(b)
     text = _escape(b.get("text", ""))
     color = b.get("color", "#000000")
     style = f' style="color:{color}"' if color and color not in ("#000000", "#000") else ""
 
-    href = _find_link(b["bbox"], links)
+    href = _find_link(b["bbox"], links, link_index)
     inner = f'<a href="{_escape(href)}" target="_blank">{text}</a>' if href else text
 
-    if kind == "h1":
-        return f'<h1 contenteditable="true"{style}>{inner}</h1>\n'
-    if kind == "h2":
-        return f'<h2 contenteditable="true"{style}>{inner}</h2>\n'
-    if kind == "h3":
-        return f'<h3 contenteditable="true"{style}>{inner}</h3>\n'
-    if kind == "legal":
-        return f'<p class="legal" contenteditable="true"{style}>{inner}</p>\n'
-    return f'<p contenteditable="true"{style}>{inner}</p>\n'
+    open_tag, close_tag = _TAG_TEMPLATES[kind]
+    return f'{open_tag}{style}>{inner}{close_tag}'
 
 
 def _section_html(blocks: list, page_width: float, assets_base_url: str) -> str:
     images = [b for b in blocks if b["type"] == "image"]
     texts = sorted([b for b in blocks if b["type"] == "text"], key=lambda b: b["bbox"][1])
     links = [b for b in blocks if b["type"] == "link"]
+    link_index = _build_link_index(links) if len(links) >= _LINK_INDEX_MIN_LINKS else None
 
-    html = '<section class="sec">\n'
+    parts = ['<section class="sec">\n']
 
     # Hero image: largest image (only if big enough)
     hero = None
@@ -140,7 +220,7 @@ def _section_html(blocks: list, page_width: float, assets_base_url: str) -> str:
         if _area(biggest["bbox"]) > 8000:
             hero = biggest
             src = assets_base_url + biggest["src"]
-            html += f'<div class="hero"><img src="{_escape(src)}" alt="" /></div>\n'
+            parts.append(f'<div class="hero"><img src="{_escape(src)}" alt="" /></div>\n')
 
     # Column detection using x0 clustering
     split_x = _detect_column_split(texts, page_width) if texts else None
@@ -148,26 +228,26 @@ def _section_html(blocks: list, page_width: float, assets_base_url: str) -> str:
     if split_x is not None:
         left_col = sorted([b for b in texts if b["bbox"][0] < split_x], key=lambda b: b["bbox"][1])
         right_col = sorted([b for b in texts if b["bbox"][0] >= split_x], key=lambda b: b["bbox"][1])
-        html += '<div class="cols">\n<div class="col">\n'
+        parts.append('<div class="cols">\n<div class="col">\n')
         for t in left_col:
-            html += _text_html(t, links)
-        html += '</div>\n<div class="col">\n'
+            parts.append(_text_html(t, links, link_index))
+        parts.append('</div>\n<div class="col">\n')
         for t in right_col:
-            html += _text_html(t, links)
-        html += '</div>\n</div>\n'
+            parts.append(_text_html(t, links, link_index))
+        parts.append('</div>\n</div>\n')
     else:
         for t in texts:
-            html += _text_html(t, links)
+            parts.append(_text_html(t, links, link_index))
 
     # Non-hero images inline
     for img in images:
         if img is hero:
             continue
         src = assets_base_url + img["src"]
-        html += f'<div class="img-block"><img src="{_escape(src)}" alt="" /></div>\n'
+        parts.append(f'<div class="img-block"><img src="{_escape(src)}" alt="" /></div>\n')
 
-    html += '</section>\n'
-    return html
+    parts.append('</section>\n')
+    return "".join(parts)
 
 
 _EDITABLE_CSS = """
@@ -196,14 +276,15 @@ def render_html(layout: dict, assets_base_url: str = "") -> str:
     Generate a semantic, editable HTML page (Modo B).
     Uses section/heading/paragraph blocks — easier to edit, not pixel-perfect.
     """
-    body = ""
+    body_parts = []
     for page in layout.get("pages", []):
         page_width = page.get("width", 595.0)
         sections = _split_sections(page.get("blocks", []))
-        body += f'<div class="page" data-page="{page["page"]}">\n'
+        body_parts.append(f'<div class="page" data-page="{page["page"]}">\n')
         for sec in sections:
-            body += _section_html(sec, page_width, assets_base_url)
-        body += '</div>\n'
+            body_parts.append(_section_html(sec, page_width, assets_base_url))
+        body_parts.append('</div>\n')
+    body = "".join(body_parts)
 
     return (
         '<!doctype html>\n<html lang="es">\n<head>\n'
@@ -233,6 +314,36 @@ _EXACT_CSS = """
 """
 
 
+# PyMuPDF span flags that affect the font: bit 4 is bold, bit 0 is italic
+_FONT_FLAGS = 0b10001
+
+# Prebuilt font-weight/font-style declarations for each combination of _FONT_FLAGS
+_FONT_CSS = {
+    0b00000: "font-weight:normal;font-style:normal;",
+    0b00001: "font-weight:normal;font-style:italic;",
+    0b10000: "font-weight:bold;font-style:normal;",
+    0b10001: "font-weight:bold;font-style:italic;",
+}
+
+
+# Element templates for render_html_exact, filled with %-formatting. Geometry
+# is left/top/width/height (min-height for text) in px with one decimal.
+_EXACT_IMAGE_TPL = (
+    '<img class="i" src="%s" '
+    'style="left:%.1fpx;top:%.1fpx;width:%.1fpx;height:%.1fpx;" alt="" />\n'
+)
+_EXACT_TEXT_TPL = (
+    '<div class="t" contenteditable="true" '
+    'style="left:%.1fpx;top:%.1fpx;width:%.1fpx;min-height:%.1fpx;'
+    'font-size:%.1fpx;color:%s;%s">%s</div>\n'
+)
+_EXACT_LINK_TPL = (
+    '<a class="hot" href="%s" target="_blank" '
+    'style="left:%.1fpx;top:%.1fpx;width:%.1fpx;height:%.1fpx;z-index:10;" '
+    'title="%s"></a>\n'
+)
+
+
 def render_html_exact(layout: dict, assets_base_url: str = "") -> str:
     """
     Generate a pixel-perfect HTML page (Modo A).
@@ -240,63 +351,52 @@ def render_html_exact(layout: dict, assets_base_url: str = "") -> str:
     Images use public URLs. Text blocks are contenteditable.
     Links are transparent overlays (<a> tags) placed over their bbox.
     """
-    pages_html = ""
+    page_parts = []
 
     for page in layout.get("pages", []):
         w = page.get("width", 595.0)
         h = page.get("height", 842.0)
-        blocks = page.get("blocks", [])
-
-        page_html = (
+        images, texts, links = [], [], []
+        layers = {"image": images, "text": texts, "link": links}
+        for b in page.get("blocks", []):
+            layer = layers.get(b["type"])
+            if layer is not None:
+                layer.append(b)
+        link_index = _build_link_index(links) if len(links) >= _LINK_INDEX_MIN_LINKS else None
+
+        page_parts.append(
             f'<div class="page" data-page="{page["page"]}" '
             f'style="width:{w:.1f}px;height:{h:.1f}px;">\n'
         )
 
         # Render images first (background layer), then text, then link overlays
-        for layer in ("image", "text", "link"):
-            for b in blocks:
-                if b["type"] != layer:
-                    continue
-                x0, y0, x1, y1 = b["bbox"]
-                bw = max(1.0, x1 - x0)
-                bh = max(1.0, y1 - y0)
-                pos = f"left:{x0:.1f}px;top:{y0:.1f}px;width:{bw:.1f}px;"
-
-                if layer == "text":
-                    size = b.get("size", 12.0)
-                    color = b.get("color", "#000000")
-                    flags = b.get("flags", 0)
-                    bold = "bold" if (flags & 0b10000) else "normal"
-                    italic = "italic" if (flags & 0b1) else "normal"
-                    style = (
-                        f"{pos}min-height:{bh:.1f}px;"
-                        f"font-size:{size:.1f}px;color:{color};"
-                        f"font-weight:{bold};font-style:{italic};"
-                    )
-                    text = _escape(b.get("text", ""))
-                    # Wrap in <a> if a link overlaps this text block
-                    href = _find_link(b["bbox"], [x for x in blocks if x["type"] == "link"])
-                    if href:
-                        inner = f'<a href="{_escape(href)}" target="_blank">{text}</a>'
-                    else:
-                        inner = text
-                    page_html += f'<div class="t" contenteditable="true" style="{style}">{inner}</div>\n'
-
-                elif layer == "image":
-                    src = assets_base_url + b["src"]
-                    style = f"{pos}height:{bh:.1f}px;"
-                    page_html += f'<img class="i" src="{_escape(src)}" style="{style}" alt="" />\n'
-
-                elif layer == "link":
-                    style = f"{pos}height:{bh:.1f}px;z-index:10;"
-                    page_html += (
-                        f'<a class="hot" href="{_escape(b["url"])}" '
-                        f'target="_blank" style="{style}" '
-                        f'title="{_escape(b["url"])}"></a>\n'
-                    )
-
-        page_html += '</div>\n'
-        pages_html += page_html
+        for b in images:
+            x0, y0, x1, y1 = b["bbox"]
+            src = _escape(assets_base_url + b["src"])
+            page_parts.append(_EXACT_IMAGE_TPL % (src, x0, y0, max(1.0, x1 - x0), max(1.0, y1 - y0)))
+
+        for b in texts:
+            x0, y0, x1, y1 = b["bbox"]
+            text = _escape(b.get("text", ""))
+            # Wrap in <a> if a link overlaps this text block
+            href = _find_link(b["bbox"], links, link_index)
+            if href:
+                inner = f'<a href="{_escape(href)}" target="_blank">{text}</a>'
+            else:
+                inner = text
+            page_parts.append(_EXACT_TEXT_TPL % (
+                x0, y0, max(1.0, x1 - x0), max(1.0, y1 - y0),
+                b.get("size", 12.0), b.get("color", "#000000"),
+                _FONT_CSS[b.get("flags", 0) & _FONT_FLAGS], inner,
+            ))
+
+        for b in links:
+            x0, y0, x1, y1 = b["bbox"]
+            url = _escape(b["url"])
+            page_parts.append(_EXACT_LINK_TPL % (url, x0, y0, max(1.0, x1 - x0), max(1.0, y1 - y0), url))
+
+        page_parts.append('</div>\n')
+    pages_html = "".join(page_parts)
 
     return (
         '<!doctype html>\n<html lang="es">\n<head>\n'
@@ -1,16 +1,28 @@
 import fitz  # PyMuPDF
+import logging
 import os
 import time
 import zipfile
-import json
+import orjson
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 from PIL import Image
 import io
 
 from app.config import settings
 from app.models.schemas import ImageInfo
 
+logger = logging.getLogger(__name__)
+
+# Extensions PyMuPDF may report that already match an output format, so the
+# image bytes can be written as-is instead of being decoded and re-encoded
+EQUIVALENT_IMAGE_EXTS = {
+    "jpg": {"jpg", "jpeg"},
+    "jpeg": {"jpg", "jpeg"},
+    "png": {"png"},
+}
+
 
 class PDFImageExtractor:
     """
@@ -26,19 +38,34 @@ class PDFImageExtractor:
         # Ensure output directory exists
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-    def extract_images(self, pdf_path: str, output_subdir: str = None) -> Tuple[List[ImageInfo], float]:
+    @staticmethod
+    def _open_pdf(pdf_source: Union[str, bytes]) -> "fitz.Document":
+        """Open a PDF from a filesystem path or from in-memory bytes."""
+        if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+            return fitz.open(stream=pdf_source, filetype="pdf")
+        return fitz.open(pdf_source)
+
+    def extract_images(
+        self,
+        pdf_path: str,
+        output_subdir: str = None,
+        output_format: Optional[str] = None
+    ) -> Tuple[List[ImageInfo], float]:
         """
         Extract all images from a PDF file.
 
         Args:
             pdf_path: Path to the PDF file
             output_subdir: Optional subdirectory name for outputs
+            output_format: Optional image format for this call (defaults to the configured format)
 
         Returns:
             Tuple of (list of ImageInfo objects, extraction time in seconds)
         """
         start_time = time.time()
         images_info = []
+        # Resolved per call so concurrent requests never share mutable state
+        output_format = (output_format or self.output_format).lower()
 
         # Create output subdirectory if specified
         if output_subdir:
@@ -88,31 +115,29 @@ class PDFImageExtractor:
                         colorspace = str(colorspace)
 
                     # Generate output filename
-                    output_filename = f"page_{page_num + 1}_img_{image_counter}.{self.output_format}"
+                    output_filename = f"page_{page_num + 1}_img_{image_counter}.{output_format}"
                     output_filepath = output_path / output_filename
 
                     # Convert and save image if needed
-                    if image_ext != self.output_format:
-                        self._convert_and_save_image(
+                    if image_ext not in EQUIVALENT_IMAGE_EXTS.get(output_format, (output_format,)):
+                        file_size = self._convert_and_save_image(
                             image_bytes,
                             output_filepath,
-                            self.output_format
+                            output_format
                         )
                     else:
-                        # Save directly
+                        # Save directly; the file size is the length of the bytes written
                         with open(output_filepath, "wb") as img_file:
                             img_file.write(image_bytes)
-
-                    # Get file size
-                    file_size = output_filepath.stat().st_size
+                        file_size = len(image_bytes)
 
                     # Create image info
-                    img_info = ImageInfo(
+                    img_info = ImageInfo.model_construct(
                         filename=output_filename,
                         page_number=page_num + 1,
                         width=width,
                         height=height,
-                        format=self.output_format,
+                        format=output_format,
                         size_bytes=file_size,
                         color_space=colorspace
                     )
@@ -128,41 +153,71 @@ class PDFImageExtractor:
 
     def _build_ocr_render(
         self,
-        source_render_path: Path,
-        output_path: Path,
+        pix: fitz.Pixmap,
+        render_filename: str,
+        render_size_bytes: int,
         page_no: int,
         max_dimension_px: int = 7600,
     ) -> Dict:
         """
         Build an OCR-friendly render constrained below provider dimension limits.
-        """
-        with Image.open(source_render_path) as img:
-            width, height = img.size
-            if width <= max_dimension_px and height <= max_dimension_px:
-                return {
-                    "path": source_render_path,
-                    "filename": source_render_path.name,
-                    "width": width,
-                    "height": height,
-                    "format": "png",
-                    "size_bytes": source_render_path.stat().st_size,
-                    "resized": False,
-                }
 
-            ocr_render_name = output_path / f"page{page_no:03d}_render_ocr.png"
-            resized = img.copy()
-            resized.thumbnail((max_dimension_px, max_dimension_px), Image.Resampling.LANCZOS)
-            resized.save(ocr_render_name, format="PNG", optimize=True)
+        Works from the page's pixmap, so the render PNG is never decoded again.
+        "data" holds the encoded PNG when a separate resized render was made,
+        and is None when the page render itself is used.
+        """
+        width, height = pix.width, pix.height
+        if width <= max_dimension_px and height <= max_dimension_px:
             return {
-                "path": ocr_render_name,
-                "filename": ocr_render_name.name,
-                "width": resized.width,
-                "height": resized.height,
+                "data": None,
+                "filename": render_filename,
+                "width": width,
+                "height": height,
                 "format": "png",
-                "size_bytes": ocr_render_name.stat().st_size,
-                "resized": True,
+                "size_bytes": render_size_bytes,
+                "resized": False,
             }
 
+        resized = pix.pil_image()
+        resized.thumbnail((max_dimension_px, max_dimension_px), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, format="PNG", optimize=True)
+        data = buffer.getvalue()
+        return {
+            "data": data,
+            "filename": f"page{page_no:03d}_render_ocr.png",
+            "width": resized.width,
+            "height": resized.height,
+            "format": "png",
+            "size_bytes": len(data),
+            "resized": True,
+        }
+
+    def _store_file(
+        self,
+        zf: zipfile.ZipFile,
+        output_path: Path,
+        filename: str,
+        data: bytes,
+        keep_files: bool,
+        compress_type: int = zipfile.ZIP_STORED
+    ) -> None:
+        """
+        Add a generated file to the ZIP and, if keep_files is set, write it to output_path.
+
+        Args:
+            zf: Open ZIP archive being built
+            output_path: Directory the extraction outputs belong to
+            filename: File name inside output_path
+            data: File contents
+            keep_files: Whether to also write the file to disk
+            compress_type: ZIP compression for this entry
+        """
+        if keep_files:
+            with open(output_path / filename, "wb") as f:
+                f.write(data)
+        zf.writestr(f"{output_path.name}/{filename}", data, compress_type=compress_type)
+
     def extract_images_and_renders(
         self,
         pdf_path: str,
@@ -170,7 +225,8 @@ class PDFImageExtractor:
         render_dpi: int = 200,
         session_id: str = None,
         base_url: str = None,
-        enable_urls: bool = False
+        enable_urls: bool = False,
+        keep_files: bool = True
     ) -> Tuple[Path, Path, int, int, float]:
         """
         Extract embedded images and render each page to PNG, then package everything into a ZIP.
@@ -183,200 +239,252 @@ class PDFImageExtractor:
             session_id: Optional session ID for URL generation
             base_url: Optional base URL for constructing image URLs
             enable_urls: Whether to generate public URLs for images
+            keep_files: Whether to write the extracted files to the output directory
+                as well; if False only the ZIP is written
 
         Returns:
             Tuple of (output directory, zip path, render count, total files, extraction time)
         """
+        return self._extract_images_and_renders(
+            pdf_path,
+            Path(pdf_path).name,
+            output_subdir=output_subdir,
+            render_dpi=render_dpi,
+            session_id=session_id,
+            base_url=base_url,
+            enable_urls=enable_urls,
+            keep_files=keep_files
+        )
+
+    def extract_images_and_renders_from_bytes(
+        self,
+        data: bytes,
+        filename: str,
+        output_subdir: str = None,
+        render_dpi: int = 200,
+        session_id: str = None,
+        base_url: str = None,
+        enable_urls: bool = False,
+        keep_files: bool = True
+    ) -> Tuple[Path, Path, int, int, float]:
+        """
+        Same as extract_images_and_renders, but reads the PDF from memory.
+
+        Args:
+            data: Raw PDF bytes
+            filename: Original PDF filename (used for metadata and default output dir)
+            output_subdir: Optional subdirectory name for outputs
+            render_dpi: DPI for rendered page images
+            session_id: Optional session ID for URL generation
+            base_url: Optional base URL for constructing image URLs
+            enable_urls: Whether to generate public URLs for images
+            keep_files: Whether to write the extracted files to the output directory
+                as well; if False only the ZIP is written
+
+        Returns:
+            Tuple of (output directory, zip path, render count, total files, extraction time)
+        """
+        return self._extract_images_and_renders(
+            data,
+            filename,
+            output_subdir=output_subdir,
+            render_dpi=render_dpi,
+            session_id=session_id,
+            base_url=base_url,
+            enable_urls=enable_urls,
+            keep_files=keep_files
+        )
+
+    def _extract_images_and_renders(
+        self,
+        pdf_source: Union[str, bytes],
+        pdf_filename: str,
+        output_subdir: str = None,
+        render_dpi: int = 200,
+        session_id: str = None,
+        base_url: str = None,
+        enable_urls: bool = False,
+        keep_files: bool = True
+    ) -> Tuple[Path, Path, int, int, float]:
+        """Shared implementation for path- and bytes-based extraction."""
         start_time = time.time()
 
         if output_subdir:
             output_path = self.output_dir / output_subdir
         else:
-            output_path = self.output_dir / Path(pdf_path).stem
+            output_path = self.output_dir / Path(pdf_filename).stem
 
-        output_path.mkdir(parents=True, exist_ok=True)
+        if keep_files:
+            output_path.mkdir(parents=True, exist_ok=True)
 
-        pdf_document = fitz.open(pdf_path)
+        pdf_document = self._open_pdf(pdf_source)
 
-        extracted_files = []
+        file_count = 0
         render_count = 0
         images_metadata = []
         renders_metadata = []
 
+        # Files go into the ZIP as they are produced instead of being written out
+        # and read back. Images are already compressed (PNG/JPEG), so they are
+        # stored as-is; only metadata.json is deflated.
+        zip_path = self.output_dir / f"{output_path.name}.zip"
+        # Page render transform and pixel format, built once for every page. Renders
+        # are opaque RGB; this is what dpi= would pick, but explicit.
+        render_matrix = fitz.Matrix(render_dpi / 72.0, render_dpi / 72.0)
+        # A failed extraction must not leave a truncated ZIP behind in outputs/
         try:
-            for page_index in range(len(pdf_document)):
-                page = pdf_document[page_index]
-                page_no = page_index + 1
-
-                # Render full page
-                pix = page.get_pixmap(dpi=render_dpi)
-                render_name = output_path / f"page{page_no:03d}_render.png"
-                pix.save(str(render_name))
-                extracted_files.append(render_name)
-                render_count += 1
-
-                render_url = None
-                if enable_urls and base_url and session_id:
-                    render_url = f"{base_url}/api/v1/images/{session_id}/{render_name.name}"
-
-                ocr_render = self._build_ocr_render(
-                    source_render_path=render_name,
-                    output_path=output_path,
-                    page_no=page_no,
-                    max_dimension_px=7600,
-                )
-                if ocr_render["path"] != render_name:
-                    extracted_files.append(ocr_render["path"])
-
-                ocr_render_url = None
-                if enable_urls and base_url and session_id:
-                    ocr_render_url = f"{base_url}/api/v1/images/{session_id}/{ocr_render['filename']}"
-
-                renders_metadata.append({
-                    "filename": render_name.name,
-                    "page_number": page_no,
-                    "width": pix.width,
-                    "height": pix.height,
-                    "format": "png",
-                    "size_bytes": render_name.stat().st_size,
-                    "url": render_url,
-                    "ocr_filename": ocr_render["filename"],
-                    "ocr_width": ocr_render["width"],
-                    "ocr_height": ocr_render["height"],
-                    "ocr_size_bytes": ocr_render["size_bytes"],
-                    "ocr_url": ocr_render_url if ocr_render_url else render_url,
-                    "ocr_resized": bool(ocr_render["resized"]),
-                })
-
-                # Extract embedded images with coordinates
-                image_list = page.get_images(full=True)
-                for img_i, img in enumerate(image_list, start=1):
-                    xref = img[0]
-                    base = pdf_document.extract_image(xref)
-                    img_bytes = base["image"]
-                    ext = base.get("ext", "bin")
-
-                    # Get image bounding box (coordinates in the page)
-                    # Pass the full image tuple, not just xref
-                    try:
-                        bbox = page.get_image_bbox(img)
-                    except Exception as e:
-                        # If bbox cannot be determined, use None values
-                        print(f"Warning: Could not get bbox for image xref {xref}: {e}")
-                        bbox = None
-
-                    # Get image properties
-                    width = base.get("width", 0)
-                    height = base.get("height", 0)
-                    colorspace = base.get("colorspace", "unknown")
-
-                    # Convert colorspace to string if needed
-                    if isinstance(colorspace, int):
-                        colorspace_map = {
-                            1: "DeviceGray",
-                            3: "DeviceRGB",
-                            4: "DeviceCMYK"
-                        }
-                        colorspace = colorspace_map.get(colorspace, f"Colorspace-{colorspace}")
-                    elif not isinstance(colorspace, str):
-                        colorspace = str(colorspace)
-
-                    img_name = output_path / f"page{page_no:03d}_img{img_i:02d}_xref{xref}.{ext}"
-                    with open(img_name, "wb") as f:
-                        f.write(img_bytes)
-
-                    extracted_files.append(img_name)
-
-                    # Get file size
-                    file_size = img_name.stat().st_size
-
-                    # Generate public URL if enabled
-                    image_url = None
-                    if enable_urls and base_url and session_id:
-                        image_url = f"{base_url}/api/v1/images/{session_id}/{img_name.name}"
-
-                    # Create ImageInfo with coordinates
-                    if bbox:
-                        img_info = ImageInfo(
-                            filename=img_name.name,
-                            page_number=page_no,
-                            width=width,
-                            height=height,
-                            format=ext,
-                            size_bytes=file_size,
-                            color_space=colorspace,
-                            x0=bbox.x0,
-                            y0=bbox.y0,
-                            x1=bbox.x1,
-                            y1=bbox.y1,
-                            bbox_width=bbox.width,
-                            bbox_height=bbox.height,
-                            url=image_url
+            with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+                try:
+                    for page_index in range(len(pdf_document)):
+                        page = pdf_document[page_index]
+                        page_no = page_index + 1
+
+                        # Render full page
+                        pix = page.get_pixmap(matrix=render_matrix, colorspace=fitz.csRGB, alpha=False)
+                        render_name = f"page{page_no:03d}_render.png"
+                        render_bytes = pix.tobytes("png")
+                        self._store_file(zf, output_path, render_name, render_bytes, keep_files)
+                        file_count += 1
+                        render_count += 1
+
+                        render_url = None
+                        if enable_urls and base_url and session_id:
+                            render_url = f"{base_url}/api/v1/images/{session_id}/{render_name}"
+
+                        ocr_render = self._build_ocr_render(
+                            pix,
+                            render_filename=render_name,
+                            render_size_bytes=len(render_bytes),
+                            page_no=page_no,
+                            max_dimension_px=7600,
                         )
-                    else:
-                        # No bbox available
-                        img_info = ImageInfo(
-                            filename=img_name.name,
-                            page_number=page_no,
-                            width=width,
-                            height=height,
-                            format=ext,
-                            size_bytes=file_size,
-                            color_space=colorspace,
-                            x0=None,
-                            y0=None,
-                            x1=None,
-                            y1=None,
-                            bbox_width=None,
-                            bbox_height=None,
-                            url=image_url
-                        )
-
-                    images_metadata.append(img_info.model_dump())
-
-        finally:
-            pdf_document.close()
-
-        # Create metadata.json file
-        metadata_content = {
-            "pdf_file": Path(pdf_path).name,
-            "total_pages": render_count,
-            "total_renders": render_count,
-            "total_images": len(images_metadata),
-            "extraction_time": time.time() - start_time,
-            "render_dpi": render_dpi,
-            "note": "Coordinates are in PDF points (72 points = 1 inch). Origin (0,0) is at bottom-left of page.",
-            "render_png_url": (renders_metadata[0].get("url") if renders_metadata else None),
-            "render_ocr_png_url": (renders_metadata[0].get("ocr_url") if renders_metadata else None),
-            "renders": renders_metadata,
-            "images": images_metadata
-        }
-
-        # Add session info if public URLs are enabled
-        if enable_urls and session_id:
-            from datetime import datetime, timedelta
-            from app.config import settings
-            expires_at = datetime.now() + timedelta(hours=settings.session_ttl_hours)
-            metadata_content["session_id"] = session_id
-            metadata_content["base_url"] = base_url
-            metadata_content["expires_at"] = expires_at.isoformat()
-
-        metadata_path = output_path / "metadata.json"
-        with open(metadata_path, "w", encoding="utf-8") as f:
-            json.dump(metadata_content, f, indent=2, ensure_ascii=False)
-
-        extracted_files.append(metadata_path)
+                        if ocr_render["data"] is not None:
+                            self._store_file(zf, output_path, ocr_render["filename"], ocr_render["data"], keep_files)
+                            file_count += 1
+
+                        ocr_render_url = None
+                        if enable_urls and base_url and session_id:
+                            ocr_render_url = f"{base_url}/api/v1/images/{session_id}/{ocr_render['filename']}"
+
+                        renders_metadata.append({
+                            "filename": render_name,
+                            "page_number": page_no,
+                            "width": pix.width,
+                            "height": pix.height,
+                            "format": "png",
+                            "size_bytes": len(render_bytes),
+                            "url": render_url,
+                            "ocr_filename": ocr_render["filename"],
+                            "ocr_width": ocr_render["width"],
+                            "ocr_height": ocr_render["height"],
+                            "ocr_size_bytes": ocr_render["size_bytes"],
+                            "ocr_url": ocr_render_url if ocr_render_url else render_url,
+                            "ocr_resized": bool(ocr_render["resized"]),
+                        })
+
+                        # Extract embedded images with coordinates
+                        image_list = page.get_images(full=True)
+                        for img_i, img in enumerate(image_list, start=1):
+                            xref = img[0]
+                            base = pdf_document.extract_image(xref)
+                            img_bytes = base["image"]
+                            ext = base.get("ext", "bin")
+
+                            # Get image bounding box (coordinates in the page)
+                            # Pass the full image tuple, not just xref
+                            try:
+                                bbox = page.get_image_bbox(img)
+                            except Exception as e:
+                                # If bbox cannot be determined, use None values
+                                logger.warning("Could not get bbox for image xref %s: %s", xref, e)
+                                bbox = None
+
+                            # Get image properties
+                            width = base.get("width", 0)
+                            height = base.get("height", 0)
+                            colorspace = base.get("colorspace", "unknown")
+
+                            # Convert colorspace to string if needed
+                            if isinstance(colorspace, int):
+                                colorspace_map = {
+                                    1: "DeviceGray",
+                                    3: "DeviceRGB",
+                                    4: "DeviceCMYK"
+                                }
+                                colorspace = colorspace_map.get(colorspace, f"Colorspace-{colorspace}")
+                            elif not isinstance(colorspace, str):
+                                colorspace = str(colorspace)
+
+                            img_name = f"page{page_no:03d}_img{img_i:02d}_xref{xref}.{ext}"
+                            self._store_file(zf, output_path, img_name, img_bytes, keep_files)
+                            file_count += 1
+
+                            # Generate public URL if enabled
+                            image_url = None
+                            if enable_urls and base_url and session_id:
+                                image_url = f"{base_url}/api/v1/images/{session_id}/{img_name}"
+
+                            # Plain dict with the ImageInfo fields; the values come straight
+                            # from PyMuPDF, so building and dumping a model per image is skipped
+                            images_metadata.append({
+                                "filename": img_name,
+                                "page_number": page_no,
+                                "width": width,
+                                "height": height,
+                                "format": ext,
+                                "size_bytes": len(img_bytes),
+                                "color_space": colorspace,
+                                "x0": bbox.x0 if bbox else None,
+                                "y0": bbox.y0 if bbox else None,
+                                "x1": bbox.x1 if bbox else None,
+                                "y1": bbox.y1 if bbox else None,
+                                "bbox_width": bbox.width if bbox else None,
+                                "bbox_height": bbox.height if bbox else None,
+                                "url": image_url,
+                            })
+
+                finally:
+                    pdf_document.close()
+
+                # Create metadata.json file
+                metadata_content = {
+                    "pdf_file": pdf_filename,
+                    "total_pages": render_count,
+                    "total_renders": render_count,
+                    "total_images": len(images_metadata),
+                    "extraction_time": time.time() - start_time,
+                    "render_dpi": render_dpi,
+                    "note": "Coordinates are in PDF points (72 points = 1 inch). Origin (0,0) is at bottom-left of page.",
+                    "render_png_url": (renders_metadata[0].get("url") if renders_metadata else None),
+                    "render_ocr_png_url": (renders_metadata[0].get("ocr_url") if renders_metadata else None),
+                    "renders": renders_metadata,
+                    "images": images_metadata
+                }
 
-        # Create ZIP with all generated files
-        zip_path = self.output_dir / f"{output_path.name}.zip"
-        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-            for file_path in extracted_files:
-                zf.write(file_path, arcname=file_path.relative_to(output_path.parent))
+                # Add session info if public URLs are enabled
+                if enable_urls and session_id:
+                    expires_at = datetime.now() + timedelta(hours=settings.session_ttl_hours)
+                    metadata_content["session_id"] = session_id
+                    metadata_content["base_url"] = base_url
+                    metadata_content["expires_at"] = expires_at.isoformat()
+
+                self._store_file(
+                    zf,
+                    output_path,
+                    "metadata.json",
+                    orjson.dumps(metadata_content, option=orjson.OPT_INDENT_2),
+                    keep_files,
+                    compress_type=zipfile.ZIP_DEFLATED
+                )
+                file_count += 1
+        except BaseException:
+            zip_path.unlink(missing_ok=True)
+            raise
 
         extraction_time = time.time() - start_time
-        return output_path, zip_path, render_count, len(extracted_files), extraction_time
+        return output_path, zip_path, render_count, file_count, extraction_time
 
-    def _convert_and_save_image(self, image_bytes: bytes, output_path: Path, target_format: str):
+    def _convert_and_save_image(self, image_bytes: bytes, output_path: Path, target_format: str) -> int:
         """
         Convert image bytes to target format and save.
 
@@ -384,32 +492,44 @@ class PDFImageExtractor:
             image_bytes: Raw image bytes
             output_path: Output file path
             target_format: Target image format (png, jpg, etc.)
+
+        Returns:
+            Number of bytes written, so callers don't need to stat the file
         """
         try:
             # Open image from bytes
             image = Image.open(io.BytesIO(image_bytes))
+            target_format = target_format.lower()
+            is_jpeg = target_format in ('jpg', 'jpeg')
 
             # Convert RGBA to RGB if saving as JPEG
-            if target_format.lower() in ['jpg', 'jpeg'] and image.mode == 'RGBA':
+            if is_jpeg and image.mode == 'RGBA':
                 # Create white background
                 background = Image.new('RGB', image.size, (255, 255, 255))
-                background.paste(image, mask=image.split()[3])  # 3 is the alpha channel
+                background.paste(image, mask=image.getchannel('A'))
                 image = background
 
-            # Save with quality settings
+            # Save with quality settings. optimize=True is left off: it adds a
+            # second encoding pass (extra Huffman/deflate work) for a few percent
+            # smaller files.
             save_kwargs = {}
-            if target_format.lower() in ['jpg', 'jpeg']:
+            if is_jpeg:
                 save_kwargs['quality'] = self.image_quality
-                save_kwargs['optimize'] = True
-            elif target_format.lower() == 'png':
-                save_kwargs['optimize'] = True
 
-            image.save(output_path, format=target_format.upper(), **save_kwargs)
+            # Encode in memory so the size is known without a stat();
+            # Pillow only knows the "JPEG" format name, not "JPG"
+            buffer = io.BytesIO()
+            image.save(buffer, format='JPEG' if is_jpeg else target_format.upper(), **save_kwargs)
+            converted = buffer.getbuffer()
+            with open(output_path, "wb") as img_file:
+                img_file.write(converted)
+            return converted.nbytes
 
         except Exception as e:
             # If conversion fails, save original bytes
             with open(output_path, "wb") as img_file:
                 img_file.write(image_bytes)
+            return len(image_bytes)
 
     def get_pdf_info(self, pdf_path: str) -> Dict:
         """
@@ -1,6 +1,6 @@
 import fitz  # PyMuPDF
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Union
 
 
 def _hex_color(c: int) -> str:
@@ -86,14 +86,14 @@ def _merge_spans_to_blocks(raw_blocks: list) -> list:
     return paragraphs
 
 
-def extract_layout(pdf_path: str, out_dir: str) -> Dict:
+def extract_layout(pdf_source: Union[str, bytes], out_dir: str) -> Dict:
     """
     Extract full layout from a digital PDF (text-selectable).
     Extracts: text blocks (with font/size/color), embedded images, hyperlinks.
     Images are saved as PNG files directly in out_dir.
 
     Args:
-        pdf_path: Path to the PDF file
+        pdf_source: Path to the PDF file, or its raw bytes
         out_dir: Directory where image files will be saved
 
     Returns:
@@ -114,11 +114,13 @@ def extract_layout(pdf_path: str, out_dir: str) -> Dict:
             "image_files": ["page001_img12.png", ...]
         }
     """
-    pdf_path = Path(pdf_path)
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    doc = fitz.open(str(pdf_path))
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        doc = fitz.open(stream=pdf_source, filetype="pdf")
+    else:
+        doc = fitz.open(str(pdf_source))
     result: Dict = {"pages": [], "image_files": []}
 
     try:
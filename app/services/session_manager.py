@@ -1,13 +1,22 @@
 """Session management for temporary image storage with public URLs."""
 
+import heapq
+import logging
+import os
 import threading
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import uuid4
 from dataclasses import dataclass
 
+logger = logging.getLogger(__name__)
+
+# Upper bound on threads used to delete expired session directories in parallel
+CLEANUP_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
 
 @dataclass
 class SessionData:
@@ -26,25 +35,28 @@ class SessionManager:
 
     Features:
     - Thread-safe session creation and retrieval
-    - Automatic expiry tracking
-    - Cleanup of expired sessions
+    - Automatic expiry tracking (min-heap ordered by expiry time)
+    - Cleanup of expired sessions without scanning live ones
     """
 
-    def __init__(self, ttl_hours: int, base_output_dir: Path):
+    def __init__(self, ttl_hours: int, base_output_dir: Path, sessions_dir: Optional[Path] = None):
         """
         Initialize session manager.
 
         Args:
             ttl_hours: Time-to-live for sessions in hours
             base_output_dir: Base directory for all outputs
+            sessions_dir: Directory for session files (defaults to base_output_dir/sessions)
         """
         self.ttl_hours = ttl_hours
         self.base_output_dir = base_output_dir
-        self.sessions_dir = base_output_dir / "sessions"
+        # Absolute, so session directories can be handed to the extractor as-is
+        self.sessions_dir = (sessions_dir or base_output_dir / "sessions").resolve()
         self.sessions_dir.mkdir(parents=True, exist_ok=True)
 
         # Thread-safe session registry
         self._sessions: Dict[str, SessionData] = {}
+        self._expiry_heap: List[Tuple[datetime, str]] = []
         self._lock = threading.Lock()
 
     def create_session(self, pdf_filename: str) -> str:
@@ -61,9 +73,10 @@ class SessionManager:
         created_at = datetime.now()
         expires_at = created_at + timedelta(hours=self.ttl_hours)
 
-        # Create session directory
+        # Create session directory; sessions_dir was created in __init__, so this
+        # is a single mkdir call
         session_dir = self.sessions_dir / session_id
-        session_dir.mkdir(parents=True, exist_ok=True)
+        session_dir.mkdir(exist_ok=True)
 
         # Create session data
         session_data = SessionData(
@@ -77,6 +90,7 @@ class SessionManager:
         # Store in registry (thread-safe)
         with self._lock:
             self._sessions[session_id] = session_data
+            heapq.heappush(self._expiry_heap, (expires_at, session_id))
 
         return session_id
 
@@ -172,7 +186,7 @@ class SessionManager:
             if session.output_dir.exists():
                 shutil.rmtree(session.output_dir, ignore_errors=True)
         except Exception as e:
-            print(f"Warning: Error deleting session directory {session.output_dir}: {e}")
+            logger.warning("Error deleting session directory %s: %s", session.output_dir, e)
 
         # Remove from registry
         with self._lock:
@@ -180,6 +194,40 @@ class SessionManager:
 
         return True
 
+    def _pop_expired_session_ids(self) -> List[str]:
+        """
+        Pop expired sessions off the expiry heap.
+
+        Only the expired entries at the top of the heap are touched, so the
+        cost does not grow with the number of live sessions.
+
+        Returns:
+            List of session IDs that have expired
+        """
+        now = datetime.now()
+        expired_ids = []
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, session_id = heapq.heappop(self._expiry_heap)
+                # Sessions deleted explicitly are already gone from the registry
+                if session_id in self._sessions:
+                    expired_ids.append(session_id)
+        return expired_ids
+
+    def seconds_until_next_expiry(self) -> Optional[float]:
+        """
+        Get the time until the next session expires.
+
+        Returns:
+            Seconds until the earliest expiry (0 if one is already due), or None if
+            there are no sessions
+        """
+        with self._lock:
+            if not self._expiry_heap:
+                return None
+            next_expiry = self._expiry_heap[0][0]
+        return max(0.0, (next_expiry - datetime.now()).total_seconds())
+
     def cleanup_expired_sessions(self) -> int:
         """
         Remove all expired sessions and their files.
@@ -187,14 +235,14 @@ class SessionManager:
         Returns:
             Number of sessions cleaned up
         """
-        expired_ids = self.get_expired_sessions()
-        deleted_count = 0
-
-        for session_id in expired_ids:
-            if self.delete_session(session_id):
-                deleted_count += 1
-
-        return deleted_count
+        expired_ids = self._pop_expired_session_ids()
+        if not expired_ids:
+            return 0
+
+        # Directory removal is I/O bound, so overlap it across a few threads
+        workers = min(CLEANUP_MAX_WORKERS, len(expired_ids))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return sum(pool.map(self.delete_session, expired_ids))
 
     def get_active_session_count(self) -> int:
         """
@@ -9,7 +9,7 @@ import io
 import re
 import unicodedata
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import fitz  # PyMuPDF
 
@@ -317,7 +317,7 @@ def _render_page_png(
 # ── Main function ──────────────────────────────────────────────────────────────
 
 def extract_structured(
-    pdf_path: str,
+    pdf_source: Union[str, bytes],
     out_dir: str,
     session_id: str,
     base_url: str,
@@ -331,7 +331,7 @@ def extract_structured(
     Does NOT generate HTML — all orchestration happens in n8n.
 
     Args:
-        pdf_path:   Path to the PDF file on disk.
+        pdf_source: Path to the PDF file on disk, or its raw bytes.
         out_dir:    Directory where image files and render PNGs will be saved.
         session_id: Session ID for constructing public URLs.
         base_url:   Base URL of the extractor service (e.g. https://host.com).
@@ -343,12 +343,15 @@ def extract_structured(
     out_path = Path(out_dir)
     out_path.mkdir(parents=True, exist_ok=True)
 
-    doc = fitz.open(pdf_path)
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        doc = fitz.open(stream=pdf_source, filetype="pdf")
+    else:
+        doc = fitz.open(pdf_source)
     doc_id = session_id[:8]
 
     result: Dict = {
         "doc_id": doc_id,
-        "source_filename": source_filename or Path(pdf_path).name,
+        "source_filename": source_filename or (Path(pdf_source).name if isinstance(pdf_source, str) else None),
         "extracted_at": __import__("datetime").datetime.utcnow().isoformat() + "Z",
         "pages": [],
     }
@@ -0,0 +1,253 @@
+"""
+Tests for the PDF URL download checks: URL validation, redirects and the
+address check done when a connection is opened.
+
+Test hostnames are resolved by a fake resolver, so no network access is needed.
+"""
+import asyncio
+import contextlib
+import socket
+import ssl
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+import trustme
+from fastapi import HTTPException
+
+from app.api import endpoints
+
+
+# Hosts served by the local test servers; they count as public addresses
+LOCAL_HOSTS = {"a.test", "b.test"}
+
+# Hosts that resolve to internal addresses and must never be connected to
+INTERNAL_ADDRESSES = {
+    "metadata.test": "169.254.169.254",
+    "private.test": "10.0.0.5",
+}
+
+PDF_BODY = b"%PDF-1.4\n% test document\n"
+
+
+class _TestServer:
+    """Minimal HTTP/1.1 server with keep-alive that records what it was sent."""
+
+    def __init__(self, ssl_context=None):
+        self.ssl_context = ssl_context
+        self.server_names = []
+        self.hosts = []
+        self.port = None
+        self._server = None
+
+    async def start(self):
+        if self.ssl_context is not None:
+            self.ssl_context.sni_callback = self._record_server_name
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0, ssl=self.ssl_context)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _record_server_name(self, ssl_object, server_name, ssl_context):
+        self.server_names.append(server_name)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                path = request_line.split(" ")[1]
+                headers = dict(line.split(": ", 1) for line in header_lines if line)
+                self.hosts.append(headers.get("host") or headers.get("Host"))
+                writer.write(self._response(path))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    def _response(self, path):
+        parsed = urlparse(path)
+        if parsed.path == "/doc.pdf":
+            return (
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/pdf\r\n"
+                b"Content-Length: %d\r\n\r\n" % len(PDF_BODY)
+            ) + PDF_BODY
+        if parsed.path == "/redirect":
+            location = parse_qs(parsed.query)["to"][0]
+            return f"HTTP/1.1 302 Found\r\nLocation: {location}\r\nContent-Length: 0\r\n\r\n".encode()
+        if parsed.path == "/loop":
+            return b"HTTP/1.1 302 Found\r\nLocation: /loop\r\nContent-Length: 0\r\n\r\n"
+        return b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n"
+
+
+@pytest.fixture
+def ca():
+    return trustme.CA()
+
+
+@pytest.fixture(autouse=True)
+def fake_dns(monkeypatch):
+    """Resolve test hostnames without DNS."""
+    real_getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host in LOCAL_HOSTS:
+            return real_getaddrinfo("127.0.0.1", port, *args, **kwargs)
+        if host == "mixed.test":
+            # One public and one internal address
+            return [
+                (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("203.0.113.10", port)),
+                (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port)),
+            ]
+        if host in INTERNAL_ADDRESSES:
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (INTERNAL_ADDRESSES[host], port))]
+        raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    monkeypatch.setattr(endpoints.settings, "allow_private_pdf_urls", False)
+
+    # The local servers listen on loopback; treat that as public for the test hosts only
+    resolve_public_address = endpoints._resolve_public_address
+
+    async def resolve(host, port):
+        if host in LOCAL_HOSTS:
+            return "127.0.0.1"
+        return await resolve_public_address(host, port)
+
+    monkeypatch.setattr(endpoints, "_resolve_public_address", resolve)
+
+
+@contextlib.asynccontextmanager
+async def _client(monkeypatch, ca):
+    """Swap the shared download client for one that trusts the test CA."""
+    client_context = ssl.create_default_context()
+    ca.configure_trust(client_context)
+    client = httpx.AsyncClient(
+        timeout=5,
+        follow_redirects=False,
+        transport=endpoints.PublicAddressTransport(verify=client_context),
+    )
+    monkeypatch.setattr(endpoints, "http_client", client)
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+
+@contextlib.asynccontextmanager
+async def _server(ssl_context=None):
+    server = _TestServer(ssl_context)
+    await server.start()
+    try:
+        yield server
+    finally:
+        await server.stop()
+
+
+async def _download_error(url):
+    with pytest.raises(HTTPException) as exc_info:
+        await endpoints._download_pdf(url)
+    return exc_info.value
+
+
+def test_tls_connection_is_not_reused_for_another_host_on_the_same_address(monkeypatch, ca):
+    """A connection verified for a.test must not carry a request for b.test."""
+    server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ca.issue_cert("a.test").configure_cert(server_context)
+
+    async def scenario():
+        async with _server(server_context) as server, _client(monkeypatch, ca):
+            cold = await _download_error(f"https://b.test:{server.port}/doc.pdf")
+            assert cold.status_code == 400
+
+            assert await endpoints._download_pdf(f"https://a.test:{server.port}/doc.pdf") == PDF_BODY
+
+            warm = await _download_error(f"https://b.test:{server.port}/doc.pdf")
+            assert warm.status_code == 400
+            # The second b.test request needed a new handshake of its own
+            assert server.server_names[-1] == "b.test"
+            assert server.hosts == [f"a.test:{server.port}"]
+
+    asyncio.run(scenario())
+
+
+def test_download_keeps_host_header_and_sni(monkeypatch, ca):
+    server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ca.issue_cert("a.test").configure_cert(server_context)
+
+    async def scenario():
+        async with _server(server_context) as server, _client(monkeypatch, ca):
+            assert await endpoints._download_pdf(f"https://a.test:{server.port}/doc.pdf") == PDF_BODY
+            assert server.server_names == ["a.test"]
+            assert server.hosts == [f"a.test:{server.port}"]
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("host", ["metadata.test", "private.test", "mixed.test"])
+def test_internal_address_is_rejected(monkeypatch, ca, host):
+    async def scenario():
+        async with _client(monkeypatch, ca):
+            error = await _download_error(f"http://{host}/doc.pdf")
+            assert error.status_code == 400
+            assert error.detail == "PDF URL must point to a public address"
+
+    asyncio.run(scenario())
+
+
+def test_redirect_to_internal_address_is_rejected(monkeypatch, ca):
+    async def scenario():
+        async with _server() as server, _client(monkeypatch, ca):
+            url = f"http://a.test:{server.port}/redirect?to=http://metadata.test/latest/meta-data/"
+            error = await _download_error(url)
+            assert error.status_code == 400
+            assert error.detail == "PDF URL must point to a public address"
+
+    asyncio.run(scenario())
+
+
+def test_redirect_is_followed(monkeypatch, ca):
+    async def scenario():
+        async with _server() as server, _client(monkeypatch, ca):
+            url = f"http://b.test:{server.port}/redirect?to=http://a.test:{server.port}/doc.pdf"
+            assert await endpoints._download_pdf(url) == PDF_BODY
+            assert server.hosts == [f"b.test:{server.port}", f"a.test:{server.port}"]
+
+    asyncio.run(scenario())
+
+
+def test_redirect_loop_is_rejected(monkeypatch, ca):
+    async def scenario():
+        async with _server() as server, _client(monkeypatch, ca):
+            error = await _download_error(f"http://a.test:{server.port}/loop")
+            assert error.status_code == 400
+            assert error.detail == "Too many redirects downloading PDF"
+            assert len(server.hosts) == endpoints.MAX_DOWNLOAD_REDIRECTS + 1
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("url, detail", [
+    ("ftp://a.test/doc.pdf", "Invalid URL format (expected an absolute http or https URL)"),
+    ("http:///doc.pdf", "Invalid URL format (expected an absolute http or https URL)"),
+    ("http://a.test:99999/doc.pdf", "Invalid URL port"),
+    ("http://a.test:abc/doc.pdf", "Invalid URL port"),
+])
+def test_invalid_url_is_rejected(url, detail):
+    with pytest.raises(HTTPException) as exc_info:
+        endpoints._check_download_url(url)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == detail
+
+
+def test_unresolvable_host_is_rejected(monkeypatch, ca):
+    async def scenario():
+        async with _client(monkeypatch, ca):
+            error = await _download_error("http://missing.test/doc.pdf")
+            assert error.status_code == 400
+            assert error.detail == "Could not resolve PDF URL host"
+
+    asyncio.run(scenario())